@@ -0,0 +1,82 @@
+"""
+Per-clip wall time and SarvamAI jobs per clip for clips arriving close together: one job
+per clip (BATCH_MAX_FILES=1, the default) against TranslationBatcher sharing a job between
+up to --max-files clips. Clips go through _route_translation, as the translation pool does.
+The default clip length (30 s) sits between SYNC_MAX_S and LONG_CLIP_S, the only clips
+that take the batch route without a failed sync call. Uses bench/fake_sarvamai, whose
+jobs take a fixed time per SDK call and per job. Needs Kivy installed, as main.py does.
+
+    python bench/bench_batching.py [--clips N] [--clip-s S] [--gap-ms MS] [--max-files N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, 'fake_sarvamai'), os.path.dirname(HERE)]
+
+import main  # noqa: E402
+import sarvamai  # noqa: E402
+
+
+def write_clips(out_dir, count, seconds):
+    paths = []
+    for i in range(count):
+        path = os.path.join(out_dir, 'clip{}.wav'.format(i))
+        with wave.open(path, 'wb') as wf:
+            wf.setnchannels(main.CHANNELS)
+            wf.setsampwidth(main.SAMPWIDTH)
+            wf.setframerate(main.SAMPLE_RATE)
+            wf.writeframes(bytes([i % 256, 0]) * int(seconds * main.SAMPLE_RATE))
+        paths.append(path)
+    return paths
+
+
+def run_clips(paths, gap_s):
+    # Clips arrive gap_s apart, each on its own worker thread
+    elapsed = [None] * len(paths)
+
+    def translate(i, path):
+        t0 = time.perf_counter()
+        success, message, _ = main._route_translation(path, 'bench-key', 'saaras:v2.5', 'casual chat')
+        assert success, message
+        elapsed[i] = time.perf_counter() - t0
+
+    threads = []
+    for i, path in enumerate(paths):
+        thread = threading.Thread(target=translate, args=(i, path))
+        thread.start()
+        threads.append(thread)
+        time.sleep(gap_s)
+    for thread in threads:
+        thread.join()
+    return elapsed
+
+
+def run(clips=8, clip_s=30.0, gap_ms=150.0, max_files=4):
+    out_dir = tempfile.mkdtemp()
+    paths = write_clips(out_dir, clips, clip_s)
+    print("{} clips of {:.0f} s, {:.0f} ms apart, SYNC_MAX_S {:.0f}, job {:.1f} s + {:.1f} s per file".format(
+        clips, clip_s, gap_ms, main.SYNC_MAX_S, sarvamai.JOB_SECONDS, sarvamai.JOB_FILE_SECONDS))
+    for files in (1, max_files):
+        main.BATCH_MAX_FILES = files
+        main.translation_batcher = main.TranslationBatcher(max_files=files)
+        sarvamai.jobs_created = 0
+        elapsed = run_clips(paths, gap_ms / 1000.0)
+        print("BATCH_MAX_FILES={:<3} {:6.0f} ms per clip (max {:.0f}), {:.2f} jobs per clip".format(
+            files, sum(elapsed) * 1000.0 / clips, max(elapsed) * 1000.0, sarvamai.jobs_created / float(clips)))
+    print(main.translation_routes.stats())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clips', type=int, default=8)
+    parser.add_argument('--clip-s', type=float, default=30.0)
+    parser.add_argument('--gap-ms', type=float, default=150.0)
+    parser.add_argument('--max-files', type=int, default=4)
+    args = parser.parse_args()
+    run(args.clips, args.clip_s, args.gap_ms, args.max_files)
@@ -0,0 +1,90 @@
+"""
+Per-call latency of a sync translation against a local mock server: a new SarvamAI
+client for every call (the old behaviour) against sarvam_clients, which reuses one
+keep-alive client per API key. The server delays the first request on every new
+connection by --handshake-ms to stand in for the TCP/TLS setup a real endpoint costs.
+Uses bench/fake_sarvamai, so neither sarvamai nor httpx is needed. Needs Kivy installed,
+as main.py does.
+
+    python bench/bench_client_cache.py [--calls N] [--handshake-ms MS]
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, 'fake_sarvamai'), os.path.dirname(HERE)]
+
+import main  # noqa: E402
+import sarvamai  # noqa: E402
+
+CLIP = b'\0' * 64000  # 2 s of 16 kHz mono PCM
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep connections open between requests
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    handshake_s = 0.0
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        MockHandler.connections += 1
+        time.sleep(self.handshake_s)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = json.dumps({'transcript': 'ok'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def fresh_client_call(api_key):
+    client = sarvamai.SarvamAI(api_subscription_key=api_key)
+    try:
+        return client.speech_to_text.translate(file=io.BytesIO(CLIP))
+    finally:
+        client.close()
+
+
+def cached_client_call(api_key):
+    return main.sarvam_clients.get(api_key).speech_to_text.translate(file=io.BytesIO(CLIP))
+
+
+def run(calls=50, handshake_ms=40.0):
+    MockHandler.handshake_s = handshake_ms / 1000.0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    sarvamai.PORT = server.server_port
+    print("mock server on port {}, {:.0f} ms per new connection, {} calls each".format(
+        server.server_port, handshake_ms, calls))
+    for name, call in (('new client per call', fresh_client_call), ('sarvam_clients', cached_client_call)):
+        MockHandler.connections = 0
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            assert call('bench-key').transcript == 'ok'
+        per_call = (time.perf_counter() - t0) * 1000.0 / calls
+        print("{:<20} {:7.2f} ms per call, {} connections".format(name, per_call, MockHandler.connections))
+    print(main.sarvam_clients.stats())
+    main.sarvam_clients.clear()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=50)
+    parser.add_argument('--handshake-ms', type=float, default=40.0)
+    args = parser.parse_args()
+    run(args.calls, args.handshake_ms)
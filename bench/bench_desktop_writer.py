@@ -0,0 +1,74 @@
+"""
+Peak Python memory (tracemalloc) of a long desktop recording: the old approach, which kept
+every callback block in a list and joined them before writing, against the streaming
+path (DesktopMicSource -> CaptureEngine -> WAV consumer, as in _record_to_wav). Audio
+comes from bench/fake_sounddevice faster than real time. Needs Kivy installed, as main.py does.
+
+    python bench/bench_desktop_writer.py [seconds]
+"""
+import array
+import os
+import sys
+import tempfile
+import tracemalloc
+import wave
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, 'fake_sounddevice'), os.path.dirname(HERE)]
+
+import main  # noqa: E402
+import sounddevice  # noqa: E402
+
+
+def write_header(wf):
+    wf.setnchannels(main.CHANNELS)
+    wf.setsampwidth(main.SAMPWIDTH)
+    wf.setframerate(main.SAMPLE_RATE)
+
+
+def record_buffered(path, seconds):
+    # Pre-streaming desktop path: list of block copies, tobytes(), join, then write
+    frames = []
+    done = main.threading.Event()
+    sounddevice.TOTAL_SECONDS = seconds
+    stream = sounddevice.InputStream(samplerate=main.SAMPLE_RATE, channels=main.CHANNELS, dtype='int16',
+                                     blocksize=main.DESKTOP_BLOCK_FRAMES,
+                                     callback=lambda indata, *a: frames.append(array.array('h', indata)),
+                                     finished_callback=done.set)
+    stream.start()
+    done.wait()
+    stream.stop()
+    data = b''.join([f.tobytes() for f in frames])
+    with wave.open(path, 'wb') as wf:
+        write_header(wf)
+        wf.writeframes(data)
+    return {}
+
+
+def record_streaming(path, seconds):
+    sounddevice.TOTAL_SECONDS = seconds
+    source = main.open_mic_source()
+    source.engine.add_consumer('wav')
+    with wave.open(path, 'wb') as wf:
+        write_header(wf)
+        source.start()
+        for chunk in source.engine.consume('wav'):
+            wf.writeframes(chunk)
+    source.stop()
+    return source.engine.stats()
+
+
+def run(seconds=600):
+    out_dir = tempfile.mkdtemp()
+    for name, record in (('buffered list', record_buffered), ('streaming', record_streaming)):
+        path = os.path.join(out_dir, name.replace(' ', '_') + '.wav')
+        tracemalloc.start()
+        stats = record(path, seconds)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print("{:<14} peak {:6.1f} MB for {} s, WAV {:.1f} MB, overruns {}".format(
+            name, peak / 1e6, seconds, os.path.getsize(path) / 1e6, stats.get('overruns', 0)))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 600)
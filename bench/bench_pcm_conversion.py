@@ -0,0 +1,49 @@
+"""
+CPU per captured second of turning AudioRecord short[] reads into PCM bytes: the old
+per-sample int() + struct.pack loop against pcm16_to_bytes(). Uses bench/fake_jnius,
+where every int index of the Java array is one element access as with pyjnius.
+Needs Kivy installed, as main.py does.
+
+    python bench/bench_pcm_conversion.py [seconds]
+"""
+import os
+import struct
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, 'fake_jnius'), os.path.dirname(HERE)]
+
+import main  # noqa: E402
+from jnius import jarray  # noqa: E402
+
+READ_SAMPLES = 640  # 40 ms at 16 kHz
+
+
+def old_convert(buf, count):
+    out = bytearray()
+    for i in range(count):
+        out.extend(struct.pack('<h', int(buf[i])))
+    return bytes(out)
+
+
+def cpu_ms_per_second(convert, buf, seconds):
+    reads = seconds * main.SAMPLE_RATE // READ_SAMPLES
+    t0 = time.process_time()
+    for _ in range(reads):
+        convert(buf, READ_SAMPLES)
+    return (time.process_time() - t0) * 1000.0 / seconds
+
+
+def run(seconds=30):
+    buf = jarray('h', READ_SAMPLES)
+    for i in range(READ_SAMPLES):
+        buf[i] = (i * 37) % 65536 - 32768
+    assert old_convert(buf, READ_SAMPLES) == main.pcm16_to_bytes(buf, READ_SAMPLES)
+    print("numpy: {}".format("yes" if main.np is not None else "no"))
+    for name, convert in (('per-sample loop', old_convert), ('pcm16_to_bytes', main.pcm16_to_bytes)):
+        print("{:<16} {:6.2f} ms CPU per captured second".format(name, cpu_ms_per_second(convert, buf, seconds)))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 30)
@@ -0,0 +1,115 @@
+"""
+Drive AndroidPcmReader on Linux through bench/fake_jnius: both read modes must deliver
+the same little-endian PCM, and a ByteBuffer read failure must fall back to jarray.
+Reads go into memoryview destinations, as AndroidMicSource._read_loop does, and the
+reader loop is also driven end to end into a CaptureEngine.
+Needs Kivy installed, as main.py does.
+
+    python bench/check_android_capture.py
+"""
+import os
+import struct
+import sys
+import threading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, 'fake_jnius'), os.path.dirname(HERE)]
+
+import main  # noqa: E402
+
+CHUNK_BYTES = 640
+
+
+class FakeAudioRecord:
+    """
+    AudioRecord whose reads return a ramp of samples; read(ByteBuffer, n) can be made
+    to fail the way it does on old API levels.
+    """
+
+    def __init__(self, bytebuffer_result=None):
+        self.bytebuffer_result = bytebuffer_result
+        self.samples = [(i * 37) % 65536 - 32768 for i in range(CHUNK_BYTES // 2)]
+
+    def read(self, target, offset_or_size, size=None):
+        if size is None:
+            # read(ByteBuffer, sizeInBytes)
+            if self.bytebuffer_result is not None:
+                return self.bytebuffer_result
+            data = struct.pack('<%dh' % len(self.samples), *self.samples)[:offset_or_size]
+            target.data[:len(data)] = data
+            return len(data)
+        # read(short[], offset, size)
+        for i in range(size):
+            target[offset_or_size + i] = self.samples[i]
+        return size
+
+
+def read_once(reader):
+    # Same destination type as the reader thread's scratch buffer
+    dest = memoryview(bytearray(CHUNK_BYTES))
+    n = reader.read_into(dest)
+    return bytes(dest[:n])
+
+
+def capture(mode, chunks=20):
+    """
+    Run AndroidMicSource's reader thread into a CaptureEngine and collect `chunks` reads.
+    """
+    engine = main.CaptureEngine(CHUNK_BYTES * 64)
+    source = main.AndroidMicSource(engine)
+    source.reader = main.AndroidPcmReader(FakeAudioRecord(), CHUNK_BYTES, mode=mode)
+    engine.add_consumer('check')
+    source._thread = threading.Thread(target=source._read_loop, daemon=True)
+    source._thread.start()
+    data = bytearray()
+    for chunk in engine.consume('check'):
+        data += chunk
+        if len(data) >= chunks * CHUNK_BYTES:
+            break
+    source.stop()
+    return source, bytes(data[:chunks * CHUNK_BYTES])
+
+
+def run():
+    assert main.ANDROID, "fake_jnius was not picked up"
+    expected = struct.pack('<%dh' % (CHUNK_BYTES // 2), *FakeAudioRecord().samples)
+
+    reader = main.AndroidPcmReader(FakeAudioRecord(), CHUNK_BYTES, mode='bytebuffer')
+    assert reader.mode == 'bytebuffer'
+    assert read_once(reader) == expected
+
+    reader = main.AndroidPcmReader(FakeAudioRecord(), CHUNK_BYTES, mode='jarray')
+    assert reader.mode == 'jarray'
+    assert read_once(reader) == expected
+
+    # ERROR_INVALID_OPERATION from the ByteBuffer overload: switch modes, then read normally
+    reader = main.AndroidPcmReader(FakeAudioRecord(bytebuffer_result=-3), CHUNK_BYTES, mode='auto')
+    assert reader.mode == 'bytebuffer'
+    assert read_once(reader) == b''
+    assert reader.mode == 'jarray' and reader.last_error == -3
+    assert read_once(reader) == expected
+
+    assert main.pcm16_to_bytes(reader._jshorts, CHUNK_BYTES // 2) == expected
+
+    for mode in ('bytebuffer', 'jarray'):
+        source, data = capture(mode)
+        assert source.error is None, (mode, source.error)
+        assert source.reader.mode == mode
+        # Every read returns the same ramp, so even dropped chunks keep the stream aligned
+        assert data == expected * 20, mode
+
+    # A reader that throws must be recorded on the source and still end the stream
+    engine = main.CaptureEngine(CHUNK_BYTES * 4)
+    source = main.AndroidMicSource(engine)
+    broken = FakeAudioRecord()
+    broken.read = lambda *args: 1 / 0
+    source.reader = main.AndroidPcmReader(broken, CHUNK_BYTES, mode='jarray')
+    engine.add_consumer('check')
+    source._read_loop()
+    assert list(engine.consume('check')) == []
+    assert isinstance(source.error, ZeroDivisionError)
+    print("android capture: bytebuffer, jarray, fallback and reader loop OK")
+
+
+if __name__ == '__main__':
+    run()
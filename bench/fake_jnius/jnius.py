@@ -0,0 +1,68 @@
+"""
+Stand-in for pyjnius on Linux: Java arrays are array.array / lists and the only classes
+are the java.nio ones the capture path touches. Put this directory first on sys.path
+and main.py takes its Android branch.
+"""
+import array
+
+
+class JavaShortArray:
+    """
+    short[] without the buffer protocol (like older pyjnius): every int index is one
+    element access, slices return a list.
+    """
+
+    def __init__(self, size):
+        self._data = [0] * size
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._data[index]
+        return int(self._data[index])
+
+    def __setitem__(self, index, value):
+        self._data[index] = value
+
+
+def jarray(code, size):
+    if code == 'h':
+        return JavaShortArray(size)
+    return array.array(code, bytes(size * array.array(code).itemsize))
+
+
+class _DirectByteBuffer:
+    def __init__(self, size):
+        self.data = bytearray(size)
+
+    def order(self, order):
+        return self
+
+    def clear(self):
+        pass
+
+    def rewind(self):
+        pass
+
+    def get(self, dst, offset, length):
+        # Java bytes are signed
+        dst[offset:offset + length] = array.array('b', bytes(self.data[:length]))
+
+
+class ByteBuffer:
+    @staticmethod
+    def allocateDirect(size):
+        return _DirectByteBuffer(size)
+
+
+class ByteOrder:
+    LITTLE_ENDIAN = 'LITTLE_ENDIAN'
+
+
+_CLASSES = {'java.nio.ByteBuffer': ByteBuffer, 'java.nio.ByteOrder': ByteOrder}
+
+
+def autoclass(name):
+    return _CLASSES[name]
@@ -0,0 +1,108 @@
+"""
+Stand-in for the SarvamAI SDK. The sync endpoint talks to a local mock server (see
+bench_client_cache.py); like the real client, each SarvamAI instance keeps one
+keep-alive HTTP connection, so only the first call on a client pays the connect.
+Batch jobs run in process (see bench_batching.py): each SDK call sleeps for a fixed
+latency and a started job completes JOB_SECONDS (+ JOB_FILE_SECONDS per file) later.
+"""
+import http.client
+import itertools
+import json
+import os
+import threading
+import time
+
+HOST = '127.0.0.1'
+PORT = None  # set by the benchmark once the mock server is listening
+
+CALL_SECONDS = 0.15  # create_job, upload_files and start each take this long
+JOB_SECONDS = 2.0
+JOB_FILE_SECONDS = 0.2
+jobs_created = 0
+
+_job_ids = itertools.count(1)
+_jobs_lock = threading.Lock()
+
+
+class _Response:
+    def __init__(self, transcript):
+        self.transcript = transcript
+
+
+class _SpeechToText:
+    def __init__(self, client):
+        self._client = client
+
+    def translate(self, file, model=None, prompt=None, **kwargs):
+        body = file.read()
+        reply = self._client._post('/speech-to-text-translate', body)
+        return _Response(reply['transcript'])
+
+
+class _JobStatus:
+    def __init__(self, job_state):
+        self.job_state = job_state
+
+
+class _Job:
+    def __init__(self):
+        self.job_id = 'job-{}'.format(next(_job_ids))
+        self._files = []
+        self._done_at = None
+
+    def upload_files(self, file_paths, **kwargs):
+        time.sleep(CALL_SECONDS)
+        self._files = list(file_paths)
+
+    def start(self):
+        time.sleep(CALL_SECONDS)
+        self._done_at = time.monotonic() + JOB_SECONDS + JOB_FILE_SECONDS * len(self._files)
+
+    def get_status(self):
+        done = self._done_at is not None and time.monotonic() >= self._done_at
+        return _JobStatus('Completed' if done else 'Running')
+
+    def is_failed(self):
+        return False
+
+    def get_output_mappings(self):
+        return [{'input_file': os.path.basename(p), 'output_file': self._output_name(p)} for p in self._files]
+
+    def download_outputs(self, output_dir):
+        for path in self._files:
+            with open(os.path.join(output_dir, self._output_name(path)), 'w') as f:
+                json.dump({'transcript': 'translated ' + os.path.basename(path)}, f)
+
+    @staticmethod
+    def _output_name(path):
+        return os.path.splitext(os.path.basename(path))[0] + '.json'
+
+
+class _TranslateJobs:
+    # No get_download_links, so the app falls back to download_outputs()
+    def create_job(self, model=None, with_diarization=False, num_speakers=None, prompt=None):
+        global jobs_created
+        time.sleep(CALL_SECONDS)
+        with _jobs_lock:
+            jobs_created += 1
+        return _Job()
+
+
+class SarvamAI:
+    def __init__(self, api_subscription_key, httpx_client=None):
+        self.api_subscription_key = api_subscription_key
+        self._conn = http.client.HTTPConnection(HOST, PORT, timeout=30)
+        self._lock = threading.Lock()
+        self.speech_to_text = _SpeechToText(self)
+        self.speech_to_text_translate_job = _TranslateJobs()
+
+    def _post(self, path, body):
+        with self._lock:
+            self._conn.request('POST', path, body=body,
+                               headers={'api-subscription-key': self.api_subscription_key,
+                                        'Content-Type': 'application/octet-stream'})
+            response = self._conn.getresponse()
+            return json.loads(response.read())
+
+    def close(self):
+        self._conn.close()
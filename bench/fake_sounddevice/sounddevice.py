@@ -0,0 +1,55 @@
+"""
+Stand-in for sounddevice: an InputStream whose callback receives int16 blocks of a
+fixed test tone from a background thread, SPEEDUP times faster than real time.
+"""
+import array
+import math
+import threading
+import time
+
+SPEEDUP = 200.0
+TOTAL_SECONDS = None  # stop the stream by itself after this much audio, if set
+
+
+class CallbackStop(Exception):
+    pass
+
+
+class InputStream:
+    def __init__(self, samplerate, channels, dtype, blocksize, callback, finished_callback=None):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.finished_callback = finished_callback
+        self.blocks = 0
+        self._block = array.array('h', (int(3000 * math.sin(i / 5.0)) for i in range(blocksize * channels)))
+        self._running = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        period = self.blocksize / float(self.samplerate) / SPEEDUP
+        next_at = time.perf_counter()
+        while self._running.is_set():
+            if TOTAL_SECONDS is not None and self.blocks * self.blocksize >= TOTAL_SECONDS * self.samplerate:
+                break
+            self.callback(self._block, self.blocksize, None, None)
+            self.blocks += 1
+            next_at += period
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        if self.finished_callback is not None:
+            self.finished_callback()
+
+    def stop(self):
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        pass
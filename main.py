@@ -6,12 +6,21 @@ Sends WAV to SarvamAI wrapper function (same flow as your core) and displays ret
 """
 
 import os
+import sys
+import asyncio
+import array
+import itertools
+import collections
+from concurrent.futures import Future, ThreadPoolExecutor
 import tempfile
 import threading
 import time
+import math
 import wave
-import struct
 import json
+import hashlib
+import shutil
+import urllib.request
 
 from kivy.app import App
 from kivy.lang import Builder
@@ -66,30 +75,1913 @@ try:
 except Exception:
     ANDROID = False
 
+# How Android reads AudioRecord: 'bytebuffer' (direct java.nio.ByteBuffer, API 23+),
+# 'jarray' (short[] + bulk conversion) or 'auto' (try bytebuffer, fall back to jarray)
+ANDROID_CAPTURE_MODE = os.environ.get('SPEECH_CAPTURE_MODE', 'auto').lower()
+# Seconds of audio the preallocated capture ring holds between producer and consumers
+CAPTURE_RING_SECONDS = float(os.environ.get('SPEECH_RING_SECONDS', '2'))
+# sounddevice callback block size (frames)
+DESKTOP_BLOCK_FRAMES = 1024
+# Opt-in warm capture: keep the mic open while the app is in the foreground so a recording
+# starts instantly and includes PREROLL_MS of audio from just before the press
+WARM_CAPTURE = os.environ.get('SPEECH_WARM_CAPTURE', '0') == '1'
+PREROLL_MS = int(os.environ.get('SPEECH_PREROLL_MS', '500'))
+
+SAMPLE_RATE = 16000
+CHANNELS = 1
+SAMPWIDTH = 2  # bytes per sample (16-bit)
+
+# Translation worker pool: concurrent SarvamAI jobs, clips allowed to wait, and the
+# overflow policy when the queue is full: 'reject' the new clip, 'drop_oldest' waiting
+# clip, or 'coalesce' (share the job of an identical waiting request, else reject)
+TRANSLATE_WORKERS = int(os.environ.get('SPEECH_TRANSLATE_WORKERS', '2'))
+TRANSLATE_QUEUE_MAX = int(os.environ.get('SPEECH_TRANSLATE_QUEUE', '8'))
+TRANSLATE_OVERFLOW = os.environ.get('SPEECH_TRANSLATE_OVERFLOW', 'reject').lower()
+# Cached SarvamAI clients (and their keep-alive connections) are closed after this idle time
+CLIENT_IDLE_SECONDS = float(os.environ.get('SPEECH_CLIENT_IDLE_S', '300'))
+# SarvamAI model and prompt for every translation; both are part of the cache key
+TRANSLATE_MODEL = os.environ.get('SPEECH_TRANSLATE_MODEL', 'saaras:v2.5')
+TRANSLATE_PROMPT = os.environ.get('SPEECH_TRANSLATE_PROMPT', 'casual chat')
+
+# Managed storage for recordings and downloaded job outputs, evicted least-recently-used
+# first once either budget is exceeded
+STORAGE_DIR = os.environ.get('SPEECH_STORAGE_DIR', os.path.join(os.getcwd(), 'speech_data'))
+STORAGE_MAX_BYTES = int(os.environ.get('SPEECH_STORAGE_MAX_MB', '256')) * 1024 * 1024
+STORAGE_MAX_ITEMS = int(os.environ.get('SPEECH_STORAGE_MAX_ITEMS', '200'))
+# Job outputs are parsed from memory; a single output file larger than this spills to a temp file
+RESULT_SPOOL_BYTES = int(os.environ.get('SPEECH_RESULT_SPOOL_KB', '1024')) * 1024
+# Translation result cache: in-memory LRU entries, on-disk budget and entry lifetime
+CACHE_MEMORY_ITEMS = int(os.environ.get('SPEECH_CACHE_MEMORY_ITEMS', '64'))
+CACHE_DISK_BYTES = int(os.environ.get('SPEECH_CACHE_DISK_KB', '2048')) * 1024
+CACHE_TTL_SECONDS = float(os.environ.get('SPEECH_CACHE_TTL_H', '168')) * 3600
+
+# Silence trimming before upload: frames quieter than the threshold (or the measured
+# noise floor, whichever is higher) are cut from both ends, keeping TRIM_PAD_MS of padding
+TRIM_SILENCE = os.environ.get('SPEECH_TRIM_SILENCE', '1') == '1'
+TRIM_THRESHOLD_DBFS = float(os.environ.get('SPEECH_TRIM_THRESHOLD_DBFS', '-45'))
+TRIM_PAD_MS = int(os.environ.get('SPEECH_TRIM_PAD_MS', '200'))
+TRIM_FRAME_MS = 20
+
+# Pre-flight gate: clips shorter, quieter or more clipped than this never reach the API
+GATE_MIN_SECONDS = float(os.environ.get('SPEECH_GATE_MIN_S', '0.4'))
+GATE_MIN_RMS_DBFS = float(os.environ.get('SPEECH_GATE_MIN_RMS_DBFS', '-55'))
+GATE_MIN_PEAK_DBFS = float(os.environ.get('SPEECH_GATE_MIN_PEAK_DBFS', '-40'))
+GATE_MAX_CLIPPING = float(os.environ.get('SPEECH_GATE_MAX_CLIPPING', '0.25'))
+
+# Upload payload: 'flac' (lossless, via soundfile), 'wav', or 'auto' to pick per clip from
+# measured upload throughput and encode cost; falls back to WAV if encoding fails
+UPLOAD_FORMAT = os.environ.get('SPEECH_UPLOAD_FORMAT', 'auto').lower()
+
+# Streaming mode: while the button is held, cut the capture at pauses and translate each
+# segment as soon as it closes. A pause is SEGMENT_PAUSE_MS of silence after at least
+# SEGMENT_MIN_MS of segment; segments longer than SEGMENT_MAX_S are cut regardless.
+STREAM_SEGMENTS = os.environ.get('SPEECH_STREAMING', '0') == '1'
+SEGMENT_PAUSE_MS = int(os.environ.get('SPEECH_SEGMENT_PAUSE_MS', '600'))
+SEGMENT_MIN_MS = int(os.environ.get('SPEECH_SEGMENT_MIN_MS', '800'))
+SEGMENT_MAX_S = float(os.environ.get('SPEECH_SEGMENT_MAX_S', '30'))
+
+# Long recordings are split at the quietest point near every LONG_SEGMENT_S and the parts
+# translated as parallel jobs (at most LONG_PARALLEL_JOBS at once); neighbouring parts
+# overlap by LONG_OVERLAP_MS and the repeated words are removed when stitching
+LONG_CLIP_S = float(os.environ.get('SPEECH_LONG_CLIP_S', '45'))
+LONG_SEGMENT_S = float(os.environ.get('SPEECH_LONG_SEGMENT_S', '20'))
+LONG_PARALLEL_JOBS = int(os.environ.get('SPEECH_LONG_PARALLEL_JOBS', '3'))
+LONG_OVERLAP_MS = int(os.environ.get('SPEECH_LONG_OVERLAP_MS', '300'))
+
+# Multi-file batching: with BATCH_MAX_FILES > 1, clips arriving within BATCH_WINDOW_MS of
+# each other share one SarvamAI job (raise SPEECH_TRANSLATE_WORKERS to match). Clips up to
+# SYNC_MAX_S use the sync endpoint and clips over LONG_CLIP_S are split into parts short
+# enough for it, so with the defaults (25 s, 45 s) the batcher only sees clips between
+# SYNC_MAX_S and LONG_CLIP_S, or clips whose sync call failed. See bench/bench_batching.py.
+BATCH_MAX_FILES = int(os.environ.get('SPEECH_BATCH_MAX_FILES', '1'))
+BATCH_WINDOW_MS = int(os.environ.get('SPEECH_BATCH_WINDOW_MS', '400'))
+
+# Clips up to SYNC_MAX_S seconds go to the synchronous speech-translate endpoint (one
+# request, no job lifecycle); longer ones, or a failed sync call, use a batch job. 0 disables.
+SYNC_MAX_S = float(os.environ.get('SPEECH_SYNC_MAX_S', '25'))
+
+# Batch job status is polled by the app: every POLL_MIN_MS at first, backing off to
+# POLL_MAX_S, and tightened again around the duration past jobs of similar length took.
+# A job still running JOB_DEADLINE_S after the request started is given up on.
+POLL_MIN_MS = int(os.environ.get('SPEECH_POLL_MIN_MS', '250'))
+POLL_MAX_S = float(os.environ.get('SPEECH_POLL_MAX_S', '5'))
+JOB_DEADLINE_S = float(os.environ.get('SPEECH_JOB_DEADLINE_S', '120'))
+# A failed status call is retried with backoff; only this many in a row fail the request
+POLL_MAX_ERRORS = int(os.environ.get('SPEECH_POLL_MAX_ERRORS', '5'))
+
+# All outstanding batch jobs are watched from one asyncio loop thread; the blocking status
+# and output calls run on a fixed pool of JOB_STATUS_THREADS threads
+JOB_STATUS_THREADS = int(os.environ.get('SPEECH_JOB_STATUS_THREADS', '4'))
+
+# NumPy is optional on both platforms; used for bulk sample conversion when present
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Without NumPy, level meters fall back to the C loops of audioop (stdlib until Python 3.13)
+try:
+    import warnings
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        import audioop
+except Exception:
+    audioop = None
+
+# soundfile (libsndfile) is used for FLAC upload encoding when it is bundled
+try:
+    import soundfile as sf
+except Exception:
+    sf = None
+
 # Desktop fallback imports
 if not ANDROID:
     try:
         import sounddevice as sd
-        import numpy as np
-        import soundfile as sf
         HAVE_DESKTOP_AUDIO = True
     except Exception:
         HAVE_DESKTOP_AUDIO = False
 
+def pcm16_to_bytes(samples, count):
+    """
+    Convert the first `count` 16-bit samples to little-endian PCM bytes in one bulk
+    operation. `samples` may be a Java short[] (pyjnius), list, array('h') or NumPy array.
+    Avoids the per-sample JNI access + struct.pack that used to run 32k times a second.
+    """
+    if count <= 0:
+        return b''
+    # Fast path: objects exposing the buffer protocol (array, NumPy, newer pyjnius arrays)
+    try:
+        mv = memoryview(samples)
+    except TypeError:
+        mv = None
+    if mv is not None and mv.itemsize == 2 and mv.ndim == 1:
+        if sys.byteorder == 'little':
+            return mv[:count].tobytes()
+        arr = array.array('h', mv[:count].tobytes())
+        arr.byteswap()
+        return arr.tobytes()
+
+    # Slicing a Java array converts the region in a single call instead of `count` lookups
+    try:
+        chunk = samples[:count]
+    except TypeError:
+        chunk = [samples[i] for i in range(count)]
+    if np is not None:
+        return np.asarray(chunk, dtype='<i2').tobytes()
+    arr = array.array('h', chunk)
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def java_bytes_to_bytes(jbytes, count):
+    """
+    Copy the first `count` bytes of a Java byte[] into a Python bytes object in one step.
+    """
+    try:
+        return memoryview(jbytes)[:count].tobytes()
+    except TypeError:
+        pass
+    if hasattr(jbytes, 'tostring'):
+        return jbytes.tostring()[:count]
+    # Java bytes are signed; array('b') takes them as-is
+    return array.array('b', jbytes[:count]).tobytes()
+
+
+class AndroidPcmReader:
+    """
+    Wraps an AudioRecord and reads little-endian PCM into caller-provided buffers.
+
+    'bytebuffer' mode reads into a direct java.nio.ByteBuffer so Python only ever sees
+    whole buffers; 'jarray' mode reads a short[] and converts it with pcm16_to_bytes().
+    Any failure in bytebuffer mode (old API level, missing overload) drops back to jarray.
+    """
+
+    def __init__(self, ar, chunk_bytes, mode=ANDROID_CAPTURE_MODE):
+        self.ar = ar
+        self.chunk_bytes = int(chunk_bytes) - int(chunk_bytes) % 2
+        self.mode = None
+        self.last_error = None
+        self._bb = None
+        self._jbytes = None
+        self._jshorts = None
+        if mode in ('auto', 'bytebuffer'):
+            try:
+                ByteBuffer = autoclass('java.nio.ByteBuffer')
+                ByteOrder = autoclass('java.nio.ByteOrder')
+                self._bb = ByteBuffer.allocateDirect(self.chunk_bytes)
+                self._bb.order(ByteOrder.LITTLE_ENDIAN)
+                self._jbytes = jarray('b', self.chunk_bytes)
+                self.mode = 'bytebuffer'
+            except Exception as e:
+                self.last_error = e
+        if self.mode is None:
+            self._use_jarray()
+
+    def _use_jarray(self):
+        self.mode = 'jarray'
+        self._bb = None
+        self._jbytes = None
+        # jnius.jarray('h', size) is used to create Java short array
+        self._jshorts = jarray('h', self.chunk_bytes // 2)
+
+    def read_into(self, dest):
+        """
+        Blocking read of up to one chunk straight into the preallocated writable buffer
+        `dest` (bytearray / memoryview). Returns the byte count, 0 when nothing was read.
+        """
+        if self.mode == 'bytebuffer':
+            try:
+                self._bb.clear()
+                n = self.ar.read(self._bb, self.chunk_bytes)
+            except Exception as e:
+                self.last_error = e
+                self._use_jarray()
+                return self.read_into(dest)
+            if n < 0:
+                # ERROR_INVALID_OPERATION etc.: this device can't do ByteBuffer reads
+                self.last_error = n
+                self._use_jarray()
+                return 0
+            if n == 0:
+                return 0
+            self._bb.rewind()
+            self._bb.get(self._jbytes, 0, n)
+            try:
+                # byte[] is signed ('b'); cast so it can be assigned into a 'B' memoryview
+                dest[:n] = memoryview(self._jbytes).cast('B')[:n]
+            except (TypeError, ValueError):
+                dest[:n] = java_bytes_to_bytes(self._jbytes, n)
+            return n
+
+        count = self.ar.read(self._jshorts, 0, self.chunk_bytes // 2)
+        if count <= 0:
+            self.last_error = count if count < 0 else self.last_error
+            return 0
+        n = count * 2
+        if np is not None and sys.byteorder == 'little':
+            # Write the samples directly into dest, no intermediate bytes object
+            np.frombuffer(dest, dtype='<i2', count=count)[:] = self._jshorts[:count]
+        else:
+            dest[:n] = pcm16_to_bytes(self._jshorts, count)
+        return n
+
+
+class CaptureEngine:
+    """
+    Capture buffer shared by the Android and desktop recorders: one preallocated byte
+    arena used as a ring of int16 PCM. Producers (AudioRecord reader thread, sounddevice
+    callback) copy into it with write(); consumers (WAV writer, level meter, encoder)
+    register a cursor and get zero-copy memoryview slices of the arena from consume().
+
+    The producer never blocks: if the slowest consumer has not freed enough room the
+    chunk is dropped and counted as an overrun.
+    """
+
+    def __init__(self, capacity_bytes):
+        capacity_bytes = int(capacity_bytes)
+        self.capacity = max(2, capacity_bytes - capacity_bytes % 2)
+        self._buf = bytearray(self.capacity)
+        self._mv = memoryview(self._buf)
+        self._cond = threading.Condition()
+        self._head = 0  # total bytes ever written
+        self._cursors = {}  # consumer name -> total bytes consumed
+        self._limits = {}  # consumer name -> stop position set by end_consumer()
+        self._closed = False
+        self.chunks = 0
+        self.overruns = 0
+        self.dropped_bytes = 0
+        self.high_water = 0  # max bytes buffered but not yet consumed
+
+    def add_consumer(self, name, backlog_bytes=0):
+        """
+        Register a consumer at the current write position, or up to `backlog_bytes`
+        earlier when that audio is still in the ring (pre-roll).
+        """
+        with self._cond:
+            backlog = min(int(backlog_bytes), self._head, self.capacity)
+            self._cursors[name] = self._head - (backlog - backlog % 2)
+
+    def end_consumer(self, name):
+        """
+        Let consumer `name` finish: consume() returns as soon as it has caught up with
+        what has been written so far, without waiting for another chunk.
+        """
+        with self._cond:
+            if name in self._cursors:
+                self._limits[name] = self._head
+                self._cond.notify_all()
+
+    def remove_consumer(self, name):
+        with self._cond:
+            self._cursors.pop(name, None)
+            self._limits.pop(name, None)
+            self._cond.notify_all()
+
+    def write(self, data):
+        """
+        Copy a bytes-like chunk into the ring. Returns False when it had to be dropped.
+        """
+        mv = memoryview(data).cast('B')
+        n = len(mv)
+        if n == 0:
+            return True
+        with self._cond:
+            tail = min(self._cursors.values()) if self._cursors else self._head
+            if self._closed or n > self.capacity - (self._head - tail):
+                self.overruns += 1
+                self.dropped_bytes += n
+                return False
+            start = self._head % self.capacity
+            first = min(n, self.capacity - start)
+            self._mv[start:start + first] = mv[:first]
+            if first < n:
+                self._mv[:n - first] = mv[first:]
+            self._head += n
+            self.chunks += 1
+            if self._head - tail > self.high_water:
+                self.high_water = self._head - tail
+            self._cond.notify_all()
+        return True
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def consume(self, name):
+        """
+        Yields memoryview slices of the arena for consumer `name` until the engine is
+        closed and drained. A slice stays valid until the consumer asks for the next one.
+        """
+        while True:
+            with self._cond:
+                while (name in self._cursors and self._cursors[name] >= self._head
+                       and name not in self._limits and not self._closed):
+                    self._cond.wait()
+                if name not in self._cursors:
+                    return
+                pos, head = self._cursors[name], min(self._head, self._limits.get(name, self._head))
+                if pos >= head:
+                    return
+            start = pos % self.capacity
+            n = min(head - pos, self.capacity - start)
+            try:
+                yield self._mv[start:start + n]
+            finally:
+                with self._cond:
+                    if name in self._cursors:
+                        self._cursors[name] = pos + n
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'chunks': self.chunks,
+            'overruns': self.overruns,
+            'dropped_bytes': self.dropped_bytes,
+            'high_water': self.high_water,
+        }
+
+
+class AndroidMicSource:
+    """
+    Owns an AudioRecord and a reader thread that only drains it into a CaptureEngine.
+    """
+
+    def __init__(self, engine, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+        self.engine = engine
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.ar = None
+        self.reader = None
+        self.error = None  # exception that ended the reader thread, if any
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        # pyjnius classes
+        AudioRecord = autoclass('android.media.AudioRecord')
+        AudioFormat = autoclass('android.media.AudioFormat')
+        MediaRecorder = autoclass('android.media.MediaRecorder')
+
+        # constants
+        AUDIO_SOURCE_MIC = MediaRecorder.AudioSource.MIC
+        CHANNEL_IN_MONO = AudioFormat.CHANNEL_IN_MONO
+        ENCODING_PCM_16BIT = AudioFormat.ENCODING_PCM_16BIT
+
+        # Determine min buffer size
+        min_buf = AudioRecord.getMinBufferSize(self.sample_rate, CHANNEL_IN_MONO, ENCODING_PCM_16BIT)
+        if min_buf <= 0:
+            min_buf = self.sample_rate * 2  # fallback
+        buffer_size = int(min_buf)
+
+        ar = AudioRecord(AUDIO_SOURCE_MIC, self.sample_rate, CHANNEL_IN_MONO, ENCODING_PCM_16BIT, buffer_size)
+        if ar.getState() != AudioRecord.STATE_INITIALIZED:
+            raise RuntimeError("AudioRecord initialization failed (state != INITIALIZED)")
+        self.ar = ar
+        self.reader = AndroidPcmReader(ar, buffer_size)
+
+        ar.startRecording()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._read_loop, name='pcm-reader', daemon=True)
+        self._thread.start()
+
+    def _read_loop(self):
+        # Only drains AudioRecord; file I/O happens on the consumers' threads
+        scratch = memoryview(bytearray(self.reader.chunk_bytes))
+        try:
+            while not self._stop.is_set():
+                n = self.reader.read_into(scratch)
+                if n > 0:
+                    self.engine.write(scratch[:n])
+                elif self._stop.wait(0.01):
+                    # read error / nothing available: back off briefly unless stopping
+                    break
+        except Exception as e:
+            # Closing the engine below ends the recording; keep the cause for the session
+            self.error = e
+            self.reader.last_error = e
+        finally:
+            self.engine.close()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.ar is not None:
+            try:
+                self.ar.stop()
+                self.ar.release()
+            except Exception:
+                pass
+            self.ar = None
+
+
+class DesktopMicSource:
+    """
+    sounddevice InputStream whose callback copies each block into a CaptureEngine.
+    """
+
+    def __init__(self, engine, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+        self.engine = engine
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.stream = None
+        self.error = None
+
+    def start(self):
+        def callback(indata, frames_count, time_info, status):
+            self.engine.write(indata)
+        self.stream = sd.InputStream(samplerate=self.sample_rate, channels=self.channels, dtype='int16',
+                                     blocksize=DESKTOP_BLOCK_FRAMES, callback=callback,
+                                     finished_callback=self.engine.close)
+        self.stream.start()
+
+    def stop(self):
+        if self.stream is not None:
+            try:
+                self.stream.stop()
+                self.stream.close()
+            finally:
+                self.stream = None
+                self.engine.close()
+
+
+def open_mic_source(extra_seconds=0.0):
+    """
+    Create a CaptureEngine plus the platform mic source feeding it (not yet started).
+    """
+    engine = CaptureEngine((CAPTURE_RING_SECONDS + extra_seconds) * SAMPLE_RATE * CHANNELS * SAMPWIDTH)
+    if ANDROID:
+        return AndroidMicSource(engine)
+    return DesktopMicSource(engine)
+
+
+def frame_rms(pcm, frame_samples, channels=CHANNELS):
+    """
+    RMS of each complete frame of `frame_samples` int16 samples (per channel) in `pcm`.
+    Vectorized with NumPy when available.
+    """
+    step = frame_samples * channels
+    count = len(pcm) // (2 * step)
+    if count == 0:
+        return []
+    if np is not None:
+        x = np.frombuffer(pcm, dtype='<i2', count=count * step).astype(np.float32).reshape(count, step)
+        return np.sqrt(np.mean(x * x, axis=1)).tolist()
+    if audioop is not None:
+        data = bytes(pcm[:count * step * 2])
+        if sys.byteorder != 'little':
+            data = audioop.byteswap(data, 2)
+        size = step * 2
+        return [float(audioop.rms(data[i:i + size], 2)) for i in range(0, len(data), size)]
+    samples = array.array('h', bytes(pcm[:count * step * 2]))
+    if sys.byteorder != 'little':
+        samples.byteswap()
+    return [(sum(v * v for v in samples[i:i + step]) / step) ** 0.5 for i in range(0, count * step, step)]
+
+
+def wav_frame_levels(wav_path, frame_ms=TRIM_FRAME_MS):
+    """
+    Stream a WAV file and return (params, per-frame RMS list, frame_samples).
+    Only one block of audio is held in memory at a time.
+    """
+    with wave.open(wav_path, 'rb') as wf:
+        params = wf.getparams()
+        frame_samples = max(1, params.framerate * frame_ms // 1000)
+        levels = []
+        block_frames = frame_samples * 50  # ~1 s per read
+        while True:
+            block = wf.readframes(block_frames)
+            if not block:
+                break
+            levels.extend(frame_rms(block, frame_samples, params.nchannels))
+    return params, levels, frame_samples
+
+
+def speech_bounds(levels, threshold_dbfs=TRIM_THRESHOLD_DBFS):
+    """
+    Index range [first, last) of frames above the speech threshold, or None if all silent.
+    The threshold adapts upward to 2.5x the noise floor (10th percentile frame level),
+    but never above a quarter of the loudest frame.
+    """
+    if not levels:
+        return None
+    threshold = 32768.0 * 10 ** (threshold_dbfs / 20.0)
+    ordered = sorted(levels)
+    noise_floor = ordered[len(ordered) // 10]
+    threshold = min(max(threshold, 2.5 * noise_floor), 0.25 * ordered[-1])
+    loud = [i for i, level in enumerate(levels) if level > threshold]
+    if not loud or ordered[-1] <= 32768.0 * 10 ** (threshold_dbfs / 20.0):
+        return None
+    return loud[0], loud[-1] + 1
+
+
+def plan_wav_segments(wav_path, target_s=LONG_SEGMENT_S, overlap_ms=LONG_OVERLAP_MS):
+    """
+    Plan cut points for a long WAV: each cut is the quietest 20 ms frame within a third of
+    `target_s` either side of the nominal boundary. Returns [(start_frame, end_frame)]
+    in audio frames, each part extended by `overlap_ms` into its neighbours.
+    """
+    params, levels, frame_samples = wav_frame_levels(wav_path)
+    total = params.nframes
+    target = max(1, int(target_s * 1000 / TRIM_FRAME_MS))
+    search = max(1, target // 3)
+    cuts = [0]
+    while len(levels) - cuts[-1] > target + search:
+        lo = cuts[-1] + target - search
+        hi = min(len(levels), cuts[-1] + target + search)
+        window = levels[lo:hi]
+        cuts.append(lo + window.index(min(window)))
+    overlap = params.framerate * overlap_ms // 1000
+    bounds = [c * frame_samples for c in cuts] + [total]
+    return [(max(0, bounds[i] - overlap), min(total, bounds[i + 1] + overlap)) for i in range(len(bounds) - 1)]
+
+
+def copy_wav_range(src_path, dst_path, start, end):
+    """
+    Write audio frames [start, end) of src_path to a new WAV, streaming in blocks.
+    """
+    with wave.open(src_path, 'rb') as src, wave.open(dst_path, 'wb') as dst:
+        dst.setnchannels(src.getnchannels())
+        dst.setsampwidth(src.getsampwidth())
+        dst.setframerate(src.getframerate())
+        bytes_per_frame = src.getnchannels() * src.getsampwidth()
+        src.setpos(start)
+        remaining = end - start
+        while remaining > 0:
+            block = src.readframes(min(remaining, 32768))
+            if not block:
+                break
+            dst.writeframes(block)
+            remaining -= len(block) // bytes_per_frame
+
+
+def _words(text):
+    return [w.strip('.,!?;:\'"()[]').lower() for w in text.split()]
+
+
+def stitch_transcripts(texts, max_overlap_words=12):
+    """
+    Join transcripts of consecutive overlapping parts, dropping the words each part
+    repeats from the end of the previous one.
+    """
+    out = []
+    for text in texts:
+        words = text.split()
+        if out and words:
+            tail, head = _words(' '.join(out[-max_overlap_words:])), _words(' '.join(words[:max_overlap_words]))
+            for k in range(min(len(tail), len(head)), 0, -1):
+                if tail[-k:] == head[:k]:
+                    words = words[k:]
+                    break
+        out.extend(words)
+    return ' '.join(out)
+
+
+def strip_output_labels(message):
+    """
+    Text of a translation message without the "--- file ---" label lines.
+    """
+    lines = [line for line in message.splitlines()
+             if not (line.startswith('--- ') and line.endswith(' ---'))]
+    return ' '.join(line.strip() for line in lines if line.strip())
+
+
+def trim_wav_silence(wav_path, pad_ms=TRIM_PAD_MS, threshold_dbfs=TRIM_THRESHOLD_DBFS):
+    """
+    Cut leading/trailing silence from `wav_path` in place, keeping `pad_ms` around speech.
+    Returns a dict with bytes/seconds saved (zero when nothing was cut or no speech found).
+    """
+    params, levels, frame_samples = wav_frame_levels(wav_path)
+    total = params.nframes
+    bytes_per_frame = params.nchannels * params.sampwidth
+    result = {'speech': False, 'bytes_saved': 0, 'seconds_saved': 0.0,
+              'duration': total / float(params.framerate) if params.framerate else 0.0}
+    bounds = speech_bounds(levels, threshold_dbfs)
+    if bounds is None:
+        return result
+    result['speech'] = True
+    pad = params.framerate * pad_ms // 1000
+    start = max(0, bounds[0] * frame_samples - pad)
+    end = min(total, bounds[1] * frame_samples + pad)
+    if start == 0 and end >= total:
+        return result
+
+    tmp_path = wav_path + '.trim'
+    copy_wav_range(wav_path, tmp_path, start, end)
+    os.replace(tmp_path, wav_path)
+    kept = end - start
+    result['bytes_saved'] = (total - kept) * bytes_per_frame
+    result['seconds_saved'] = (total - kept) / float(params.framerate)
+    return result
+
+
+class PauseSegmenter:
+    """
+    Splits a live int16 PCM stream into speech segments at pauses. feed() takes chunks as
+    they are captured; each closed segment (speech plus `pad_ms` of context each side) is
+    passed to on_segment(pcm_bytes). flush() closes the segment in progress.
+    """
+
+    def __init__(self, on_segment, sample_rate=SAMPLE_RATE, channels=CHANNELS, pause_ms=SEGMENT_PAUSE_MS,
+                 min_ms=SEGMENT_MIN_MS, max_s=SEGMENT_MAX_S, pad_ms=TRIM_PAD_MS,
+                 threshold_dbfs=TRIM_THRESHOLD_DBFS, frame_ms=TRIM_FRAME_MS):
+        self.on_segment = on_segment
+        self.channels = channels
+        self.frame_samples = max(1, sample_rate * frame_ms // 1000)
+        self.frame_bytes = self.frame_samples * channels * 2
+        self.pause_frames = max(1, pause_ms // frame_ms)
+        self.pad_frames = pad_ms // frame_ms
+        self.min_bytes = sample_rate * channels * 2 * min_ms // 1000
+        self.max_bytes = int(sample_rate * channels * 2 * max_s)
+        self.threshold = 32768.0 * 10 ** (threshold_dbfs / 20.0)
+        self._carry = b''
+        self._buf = bytearray()  # current segment, or pre-speech padding while idle
+        self._in_speech = False
+        self._silent_frames = 0
+        self.segments = 0
+
+    def feed(self, chunk):
+        data = self._carry + bytes(chunk)
+        whole = len(data) - len(data) % self.frame_bytes
+        self._carry = data[whole:]
+        if not whole:
+            return
+        levels = frame_rms(data[:whole], self.frame_samples, self.channels)
+        for i, level in enumerate(levels):
+            self._frame(data[i * self.frame_bytes:(i + 1) * self.frame_bytes], level > self.threshold)
+
+    def _frame(self, frame, loud):
+        self._buf += frame
+        if not self._in_speech:
+            if loud:
+                self._in_speech = True
+                self._silent_frames = 0
+            else:
+                # Idle: keep only the padding that will precede the next segment
+                del self._buf[:max(0, len(self._buf) - self.pad_frames * self.frame_bytes)]
+            return
+        self._silent_frames = 0 if loud else self._silent_frames + 1
+        if self._silent_frames >= self.pause_frames and len(self._buf) >= self.min_bytes:
+            self._emit()
+            self._in_speech = False
+        elif len(self._buf) >= self.max_bytes:
+            self._emit(keep_tail=False)
+
+    def _emit(self, keep_tail=True):
+        # Drop trailing silence beyond the padding; the kept tail seeds the next segment
+        excess = max(0, self._silent_frames - self.pad_frames) * self.frame_bytes if keep_tail else 0
+        end = len(self._buf) - excess
+        segment = bytes(self._buf[:end])
+        if keep_tail:
+            self._buf = self._buf[max(end, len(self._buf) - self.pad_frames * self.frame_bytes):]
+        else:
+            self._buf = bytearray()
+        self._silent_frames = 0
+        self.segments += 1
+        self.on_segment(segment)
+
+    def flush(self):
+        if self._in_speech and self._buf:
+            self._emit()
+        self._in_speech = False
+        self._buf = bytearray()
+        self._carry = b''
+
+
+def dbfs(value):
+    return 20.0 * math.log10(value / 32768.0) if value > 0 else float('-inf')
+
+
+class ClipAnalyzer:
+    """
+    Running level statistics of int16 PCM fed chunk by chunk from the capture writer:
+    duration, RMS, peak and the fraction of samples at full scale (clipping).
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.samples = 0
+        self.sum_squares = 0.0
+        self.peak = 0
+        self.clipped = 0
+        self._carry = b''  # odd trailing byte of the previous chunk
+
+    def update(self, chunk):
+        data = self._carry + bytes(chunk) if self._carry else memoryview(chunk).cast('B')
+        usable = len(data) - len(data) % 2
+        self._carry = bytes(data[usable:])
+        if not usable:
+            return
+        if np is not None:
+            x = np.frombuffer(data, dtype='<i2', count=usable // 2)
+            x32 = x.astype(np.int32)
+            self.sum_squares += float(np.dot(x32, x32))
+            peak = int(np.abs(x32).max())
+            self.clipped += int(np.count_nonzero((x >= 32767) | (x <= -32767)))
+        elif audioop is not None:
+            frag = bytes(data[:usable])
+            if sys.byteorder != 'little':
+                frag = audioop.byteswap(frag, 2)
+            # audioop.rms() is truncated to an integer; well under 0.1 dB at speech levels
+            rms = audioop.rms(frag, 2)
+            self.sum_squares += float(rms) * rms * (usable // 2)
+            peak = audioop.max(frag, 2)
+            if peak >= 32767:
+                # Only a chunk that reaches full scale needs the per-sample count
+                x = array.array('h')
+                x.frombytes(frag)
+                self.clipped += sum(1 for v in x if v >= 32767 or v <= -32767)
+        else:
+            x = array.array('h')
+            x.frombytes(data[:usable])
+            if sys.byteorder != 'little':
+                x.byteswap()
+            self.sum_squares += float(sum(v * v for v in x))
+            peak = max(max(x), -min(x))
+            self.clipped += sum(1 for v in x if v >= 32767 or v <= -32767)
+        self.samples += usable // 2
+        self.peak = max(self.peak, peak)
+
+    def stats(self):
+        rms = (self.sum_squares / self.samples) ** 0.5 if self.samples else 0.0
+        return {
+            'duration': self.samples / float(self.sample_rate * self.channels),
+            'rms_dbfs': dbfs(rms),
+            'peak_dbfs': dbfs(self.peak),
+            'clipping': self.clipped / float(self.samples) if self.samples else 0.0,
+        }
+
+
+class ClipGate:
+    """
+    Rejects clips locally, before any network call, when ClipAnalyzer stats fall outside
+    the configured thresholds. Counts how many API jobs that saved, per reason.
+    """
+
+    def __init__(self, min_seconds=GATE_MIN_SECONDS, min_rms_dbfs=GATE_MIN_RMS_DBFS,
+                 min_peak_dbfs=GATE_MIN_PEAK_DBFS, max_clipping=GATE_MAX_CLIPPING):
+        self.min_seconds = min_seconds
+        self.min_rms_dbfs = min_rms_dbfs
+        self.min_peak_dbfs = min_peak_dbfs
+        self.max_clipping = max_clipping
+        self._lock = threading.Lock()
+        self.passed = 0
+        self.rejected = collections.Counter()
+
+    def check(self, stats):
+        """
+        Returns None when the clip may be uploaded, else a short human-readable reason.
+        """
+        reason = None
+        if stats['duration'] < self.min_seconds:
+            reason = ('too_short', f"too short ({stats['duration']:.2f} s)")
+        elif stats['peak_dbfs'] < self.min_peak_dbfs or stats['rms_dbfs'] < self.min_rms_dbfs:
+            reason = ('silent', f"silent (RMS {stats['rms_dbfs']:.0f} dBFS, peak {stats['peak_dbfs']:.0f} dBFS)")
+        elif stats['clipping'] > self.max_clipping:
+            reason = ('clipped', f"clipped ({stats['clipping']:.0%} of samples at full scale)")
+        with self._lock:
+            if reason is None:
+                self.passed += 1
+                return None
+            self.rejected[reason[0]] += 1
+        return reason[1]
+
+    def stats(self):
+        with self._lock:
+            return {'passed': self.passed, 'jobs_saved': sum(self.rejected.values()),
+                    'rejected': dict(self.rejected)}
+
+
+clip_gate = ClipGate()
+
+
+def encode_for_upload(wav_path, fmt=UPLOAD_FORMAT):
+    """
+    Produce the payload to upload for `wav_path`. 'flac' writes a lossless FLAC next to
+    the WAV (streamed in blocks); anything else, or any encoding failure, uses the WAV.
+    Returns (upload_path, stats) with stats: format, bytes_in, bytes_out, ratio, encode_ms.
+    """
+    bytes_in = os.path.getsize(wav_path)
+    stats = {'format': 'wav', 'bytes_in': bytes_in, 'bytes_out': bytes_in, 'ratio': 1.0, 'encode_ms': 0.0}
+    if fmt == 'auto':
+        fmt, stats['predicted_s'] = upload_planner.choose(bytes_in)
+        stats['chosen'] = fmt
+    if fmt != 'flac' or sf is None:
+        return wav_path, stats
+    out_path = os.path.splitext(wav_path)[0] + '.flac'
+    t0 = time.perf_counter()
+    try:
+        with sf.SoundFile(wav_path) as src, \
+                sf.SoundFile(out_path, 'w', samplerate=src.samplerate, channels=src.channels,
+                             format='FLAC', subtype='PCM_16') as dst:
+            for block in src.blocks(blocksize=65536, dtype='int16'):
+                dst.write(block)
+    except Exception as e:
+        try:
+            os.remove(out_path)
+        except OSError:
+            pass
+        stats['error'] = repr(e)
+        return wav_path, stats
+    bytes_out = os.path.getsize(out_path)
+    stats.update(format='flac', bytes_out=bytes_out, ratio=bytes_in / float(bytes_out or 1),
+                 encode_ms=(time.perf_counter() - t0) * 1000.0)
+    upload_planner.record_encode(stats)
+    return out_path, stats
+
+
+class UploadPlanner:
+    """
+    Chooses the upload format per clip from recent measurements: effective upload
+    throughput (EWMA over real uploads), FLAC compression ratio and FLAC encode speed.
+    On fast links the encode time outweighs the bytes saved and raw WAV wins.
+    """
+
+    def __init__(self, alpha=0.3, upload_bps=64 * 1024, flac_ratio=1.5, encode_bps=4 * 1024 * 1024):
+        self.alpha = alpha
+        self.upload_bps = float(upload_bps)  # bytes/s actually achieved by recent uploads
+        self.flac_ratio = float(flac_ratio)
+        self.encode_bps = float(encode_bps)  # WAV bytes encoded per second
+        self._lock = threading.Lock()
+        self.uploads = 0
+        self.choices = collections.Counter()
+
+    def _ewma(self, old, new):
+        return old + self.alpha * (new - old)
+
+    def predict(self, wav_bytes):
+        """
+        Predicted seconds to get `wav_bytes` of audio uploaded, per format.
+        """
+        with self._lock:
+            wav_s = wav_bytes / self.upload_bps
+            flac_s = wav_bytes / self.encode_bps + wav_bytes / self.flac_ratio / self.upload_bps
+        return {'wav': wav_s, 'flac': flac_s}
+
+    def choose(self, wav_bytes):
+        """
+        Returns (format, predictions) for a clip of `wav_bytes`.
+        """
+        predicted = self.predict(wav_bytes)
+        fmt = 'flac' if sf is not None and predicted['flac'] < predicted['wav'] else 'wav'
+        with self._lock:
+            self.choices[fmt] += 1
+        return fmt, predicted
+
+    def record_upload(self, nbytes, seconds):
+        if nbytes <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            self.upload_bps = self._ewma(self.upload_bps, nbytes / seconds)
+            self.uploads += 1
+
+    def record_encode(self, stats):
+        if stats.get('format') != 'flac' or stats.get('encode_ms', 0) <= 0:
+            return
+        with self._lock:
+            self.flac_ratio = self._ewma(self.flac_ratio, stats['ratio'])
+            self.encode_bps = self._ewma(self.encode_bps, stats['bytes_in'] / (stats['encode_ms'] / 1000.0))
+
+    def stats(self):
+        with self._lock:
+            return {'upload_kbps': self.upload_bps * 8 / 1000.0, 'flac_ratio': self.flac_ratio,
+                    'encode_mbps': self.encode_bps * 8 / 1e6, 'uploads': self.uploads,
+                    'choices': dict(self.choices)}
+
+
+upload_planner = UploadPlanner()
+
+
+class SarvamClientCache:
+    """
+    Thread-safe cache of SarvamAI clients, one per API key, shared by the translation
+    workers. Each client gets its own keep-alive httpx connection pool when httpx is
+    importable, so repeat calls skip client construction and the TCP/TLS handshake.
+    Clients unused for `idle_seconds` are closed on the next lookup.
+    """
+
+    def __init__(self, idle_seconds=CLIENT_IDLE_SECONDS):
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._clients = {}  # api_key -> [client, httpx_client or None, last_used]
+        self.created = 0
+        self.hits = 0
+        self.evicted = 0
+
+    def get(self, api_key):
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.get(api_key)
+            if entry is not None:
+                entry[2] = now
+                self.hits += 1
+                return entry[0]
+
+        # Build outside the lock; if another worker won the race, keep its client
+        client, http = self._create(api_key)
+        with self._lock:
+            entry = self._clients.setdefault(api_key, [client, http, now])
+            if entry[0] is client:
+                self.created += 1
+                return client
+            self.hits += 1
+        self._close(http)
+        return entry[0]
+
+    def _create(self, api_key):
+        from sarvamai import SarvamAI
+        try:
+            import httpx
+            http = httpx.Client(timeout=httpx.Timeout(60.0, connect=10.0),
+                                limits=httpx.Limits(max_keepalive_connections=4,
+                                                    keepalive_expiry=self.idle_seconds))
+        except Exception:
+            return SarvamAI(api_subscription_key=api_key), None
+        try:
+            return SarvamAI(api_subscription_key=api_key, httpx_client=http), http
+        except TypeError:
+            # Older SDKs don't take httpx_client; they still reuse their own pool per client
+            self._close(http)
+            return SarvamAI(api_subscription_key=api_key), None
+
+    def _evict_idle(self, now):
+        for key, (client, http, last_used) in list(self._clients.items()):
+            if now - last_used > self.idle_seconds:
+                del self._clients[key]
+                self.evicted += 1
+                self._close(http)
+
+    @staticmethod
+    def _close(http):
+        if http is not None:
+            try:
+                http.close()
+            except Exception:
+                pass
+
+    def clear(self):
+        with self._lock:
+            entries, self._clients = list(self._clients.values()), {}
+        for _, http, _ in entries:
+            self._close(http)
+
+    def stats(self):
+        with self._lock:
+            return {'clients': len(self._clients), 'created': self.created,
+                    'hits': self.hits, 'evicted': self.evicted}
+
+
+sarvam_clients = SarvamClientCache()
+
+
+class StorageManager:
+    """
+    Owns the recordings/ and outputs/ directories under `root`. Every recording file and
+    job output directory is an item with a size and last-use time kept in an in-memory
+    index (rebuilt from disk once by sweep()), so budget checks never rescan the tree.
+    enforce() deletes least-recently-used items until both budgets hold; pinned items
+    (recordings being captured or translated, outputs being parsed) are never evicted.
+    """
+
+    def __init__(self, root=STORAGE_DIR, max_bytes=STORAGE_MAX_BYTES, max_items=STORAGE_MAX_ITEMS):
+        self.root = root
+        self.recordings_dir = os.path.join(root, 'recordings')
+        self.outputs_dir = os.path.join(root, 'outputs')
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._items = {}  # path -> [size_bytes, last_used]
+        self._pins = collections.Counter()
+        self.bytes_reclaimed = 0
+        self.items_reclaimed = 0
+        self.orphans_removed = 0
+
+    def _ensure_dirs(self):
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        os.makedirs(self.outputs_dir, exist_ok=True)
+
+    def new_recording_path(self):
+        """
+        Create an empty rec_*.wav in the recordings area; it starts out pinned.
+        """
+        self._ensure_dirs()
+        fd, path = tempfile.mkstemp(prefix="rec_", suffix=".wav", dir=self.recordings_dir)
+        os.close(fd)
+        self.pin(path)
+        self.touch(path, size=0)
+        return path
+
+    def pin(self, path):
+        with self._lock:
+            self._pins[path] += 1
+
+    def unpin(self, path):
+        with self._lock:
+            if self._pins[path] <= 1:
+                self._pins.pop(path, None)
+            else:
+                self._pins[path] -= 1
+
+    def touch(self, path, size=None):
+        """
+        Record that `path` was just used; re-measures its size unless given.
+        """
+        if size is None:
+            size = self._measure(path)
+        with self._lock:
+            self._items[path] = [size, time.time()]
+
+    @staticmethod
+    def _measure(path):
+        if os.path.isdir(path):
+            total = 0
+            for root, _, files in os.walk(path):
+                for fname in files:
+                    try:
+                        total += os.path.getsize(os.path.join(root, fname))
+                    except OSError:
+                        pass
+            return total
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _remove(self, path):
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def sweep(self):
+        """
+        Startup pass: drop orphans left by a previous run (header-only or unreadable WAVs,
+        empty job directories), rebuild the index from disk, then enforce the budget.
+        """
+        self._ensure_dirs()
+        items = {}
+        reclaimed = 0
+        for fname in os.listdir(self.recordings_dir):
+            path = os.path.join(self.recordings_dir, fname)
+            if not os.path.isfile(path):
+                continue
+            st = os.stat(path)
+            with self._lock:
+                pinned = self._pins[path] > 0
+            if fname.endswith('.wav') and st.st_size <= 44 and not pinned:
+                # Capture never got past the WAV header (crash / killed mid-recording);
+                # a pinned one is a recording that has only just started
+                self._remove(path)
+                reclaimed += st.st_size
+                self.orphans_removed += 1
+                continue
+            items[path] = [st.st_size, st.st_mtime]
+        for fname in os.listdir(self.outputs_dir):
+            path = os.path.join(self.outputs_dir, fname)
+            size = self._measure(path)
+            if os.path.isdir(path) and size == 0:
+                self._remove(path)
+                self.orphans_removed += 1
+                continue
+            items[path] = [size, os.stat(path).st_mtime]
+        with self._lock:
+            # Keep entries touched during this run (they are newer than the disk view)
+            items.update({p: v for p, v in self._items.items() if p in items or self._pins[p]})
+            self._items = items
+            self.bytes_reclaimed += reclaimed
+        return self.enforce()
+
+    def enforce(self):
+        """
+        Evict least-recently-used unpinned items until within budget. Returns bytes freed.
+        """
+        victims = []
+        with self._lock:
+            total = sum(size for size, _ in self._items.values())
+            count = len(self._items)
+            for path, (size, _) in sorted(self._items.items(), key=lambda kv: kv[1][1]):
+                if total <= self.max_bytes and count <= self.max_items:
+                    break
+                if self._pins[path]:
+                    continue
+                del self._items[path]
+                victims.append((path, size))
+                total -= size
+                count -= 1
+        freed = 0
+        for path, size in victims:
+            self._remove(path)
+            freed += size
+        with self._lock:
+            self.bytes_reclaimed += freed
+            self.items_reclaimed += len(victims)
+        return freed
+
+    def stats(self):
+        with self._lock:
+            return {
+                'items': len(self._items),
+                'bytes': sum(size for size, _ in self._items.values()),
+                'pinned': len(self._pins),
+                'bytes_reclaimed': self.bytes_reclaimed,
+                'items_reclaimed': self.items_reclaimed,
+                'orphans_removed': self.orphans_removed,
+            }
+
+
+storage = StorageManager()
+
+
+def job_output_dir(job, root=None):
+    """
+    Create and return a fresh download directory for one SarvamAI job under `root`
+    (default: the managed outputs area), named after the job id when the SDK exposes one.
+    """
+    root = root or storage.outputs_dir
+    os.makedirs(root, exist_ok=True)
+    job_id = str(getattr(job, 'job_id', '') or '')
+    safe_id = ''.join(c for c in job_id if c.isalnum() or c in '-_')[:64]
+    if safe_id and not os.path.exists(os.path.join(root, safe_id)):
+        path = os.path.join(root, safe_id)
+        os.makedirs(path)
+        return path
+    return tempfile.mkdtemp(prefix="job_", dir=root)
+
+
+def parse_output_text(fname, raw):
+    """
+    Pull translation text out of one downloaded output file (.txt or .json).
+    Returns a list of text entries, each headed by a "--- label ---" line.
+    """
+    entries = []
+    if fname.lower().endswith('.txt'):
+        txt = raw.strip()
+        if txt:
+            entries.append(f"--- {fname} ---\n{txt}")
+    elif fname.lower().endswith('.json'):
+        try:
+            j = json.loads(raw)
+        except ValueError:
+            return entries
+        if isinstance(j, dict):
+            for k in ('text', 'transcript', 'translation', 'translated_text'):
+                if k in j and isinstance(j[k], str) and j[k].strip():
+                    entries.append(f"--- {fname}:{k} ---\n{j[k].strip()}")
+    return entries
+
+
+def read_output_files(output_dir):
+    """
+    Read the .txt/.json files of a single job's output directory as [(file_name, text)].
+    """
+    outputs = []
+    for root, _, files in os.walk(output_dir):
+        for fname in sorted(files):
+            if not fname.lower().endswith(('.txt', '.json')):
+                continue
+            try:
+                with open(os.path.join(root, fname), 'r', encoding='utf-8') as f:
+                    outputs.append((fname, f.read()))
+            except (OSError, UnicodeDecodeError):
+                continue
+    return outputs
+
+
+def _fetch_text(url, spool_bytes=RESULT_SPOOL_BYTES):
+    # Small bodies stay in memory; only unusually large ones touch the disk
+    with tempfile.SpooledTemporaryFile(max_size=spool_bytes) as buf:
+        with urllib.request.urlopen(url, timeout=60) as resp:
+            shutil.copyfileobj(resp, buf, 64 * 1024)
+        buf.seek(0)
+        return buf.read().decode('utf-8', errors='replace')
+
+
+def fetch_job_outputs(client, job):
+    """
+    Download a finished job's output files without writing them to app storage.
+    Returns [(file_name, text)]. Raises if the SDK doesn't expose output mappings or
+    download links, so the caller can fall back to job.download_outputs().
+    """
+    names = []
+    for m in job.get_output_mappings():
+        name = m['output_file'] if isinstance(m, dict) else m.output_file
+        if name:
+            names.append(name)
+    if not names:
+        return []
+    links = client.speech_to_text_translate_job.get_download_links(job_id=job.job_id, files=names)
+    urls = links.download_urls
+    outputs = []
+    for name in names:
+        entry = urls[name]
+        outputs.append((os.path.basename(name), _fetch_text(getattr(entry, 'file_url', entry))))
+    return outputs
+
+
+def parse_job_outputs(outputs):
+    """
+    parse_output_text() over in-memory (file_name, text) pairs.
+    """
+    aggregated = []
+    for fname, raw in outputs:
+        if not fname.lower().endswith(('.txt', '.json')) and raw.lstrip().startswith('{'):
+            fname += '.json'
+        aggregated.extend(parse_output_text(fname, raw))
+    return aggregated
+
+
+def new_pcm_hasher(sample_rate=SAMPLE_RATE, channels=CHANNELS, sampwidth=SAMPWIDTH):
+    """
+    sha256 seeded with the audio format; feed it raw PCM frames to fingerprint a clip.
+    """
+    return hashlib.sha256(f"pcm:{sample_rate}:{channels}:{sampwidth}:".encode())
+
+
+def pcm_digest(wav_path):
+    """
+    Streaming hash of a WAV file's PCM payload (header excluded), same as new_pcm_hasher().
+    """
+    with wave.open(wav_path, 'rb') as wf:
+        h = new_pcm_hasher(wf.getframerate(), wf.getnchannels(), wf.getsampwidth())
+        while True:
+            frames = wf.readframes(32768)
+            if not frames:
+                break
+            h.update(frames)
+    return h.hexdigest()
+
+
+class TranslationCache:
+    """
+    Content-addressed cache of successful translations keyed by PCM hash + model + prompt.
+    A small in-memory LRU sits in front of a persistent directory of JSON entries; both
+    tiers expire entries after `ttl_seconds`, and the disk tier is trimmed LRU-first to
+    `disk_bytes`.
+    """
+
+    def __init__(self, directory=os.path.join(STORAGE_DIR, 'cache'), memory_items=CACHE_MEMORY_ITEMS,
+                 disk_bytes=CACHE_DISK_BYTES, ttl_seconds=CACHE_TTL_SECONDS):
+        self.directory = directory
+        self.memory_items = memory_items
+        self.disk_bytes = disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._memory = collections.OrderedDict()  # key -> (created, message)
+        self._disk = None  # key -> [size, last_used], loaded on first use
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(pcm_hash, model, prompt):
+        return hashlib.sha256(f"{pcm_hash}\0{model}\0{prompt}".encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def _load_disk_index(self):
+        if self._disk is not None:
+            return
+        self._disk = {}
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for fname in names:
+            if fname.endswith('.json'):
+                try:
+                    st = os.stat(os.path.join(self.directory, fname))
+                except OSError:
+                    continue
+                self._disk[fname[:-5]] = [st.st_size, st.st_mtime]
+
+    def get(self, key, count_miss=True):
+        """
+        Cached message for `key`, or None. `count_miss=False` is for early peeks that are
+        followed by a real lookup, so a miss isn't counted twice.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+            self._load_disk_index()
+            on_disk = key in self._disk
+        if on_disk:
+            try:
+                with open(self._path(key), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                created, message = float(data['created']), data['message']
+            except (OSError, ValueError, KeyError, TypeError):
+                created, message = 0.0, None
+            with self._lock:
+                if message is not None and now - created <= self.ttl_seconds:
+                    # A concurrent put() may have evicted the entry since the file was read
+                    entry = self._disk.get(key)
+                    if entry is not None:
+                        entry[1] = now
+                    self._remember(key, created, message)
+                    self.disk_hits += 1
+                    return message
+                self._disk.pop(key, None)
+            self._unlink(key)
+        if count_miss:
+            with self._lock:
+                self.misses += 1
+        return None
+
+    def contains(self, key):
+        """
+        Whether `key` has an unexpired entry, without touching hit/miss counts or LRU order.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                return True
+            self._load_disk_index()
+            if key not in self._disk:
+                return False
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return now - float(json.load(f)['created']) <= self.ttl_seconds
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def put(self, key, message):
+        now = time.time()
+        payload = json.dumps({'created': now, 'message': message}).encode('utf-8')
+        with self._lock:
+            self._remember(key, now, message)
+            self._load_disk_index()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = self._path(key) + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            return
+        with self._lock:
+            self._disk[key] = [len(payload), now]
+            victims = []
+            total = sum(size for size, _ in self._disk.values())
+            for k, (size, _) in sorted(self._disk.items(), key=lambda kv: kv[1][1]):
+                if total <= self.disk_bytes:
+                    break
+                victims.append(k)
+                total -= size
+            for k in victims:
+                del self._disk[k]
+        for k in victims:
+            self._unlink(k)
+
+    def _remember(self, key, created, message):
+        self._memory[key] = (created, message)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _unlink(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'memory_items': len(self._memory),
+                'disk_items': len(self._disk or {}),
+            }
+
+
+translation_cache = TranslationCache()
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one: the first caller runs the
+    function, later callers arriving before it finishes wait for and share its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> Future
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key, fn, *args):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.leaders += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {'leaders': self.leaders, 'shared': self.shared, 'inflight': len(self._inflight)}
+
+
+translation_flights = SingleFlight()
+
+
 # SarvamAI wrapper (adapted from your core snippet)
-def translate_audio_with_sarvamai(wav_path, api_key="", model="saaras:v2.5", prompt="casual chat"):
+def translate_audio_with_sarvamai(wav_path, api_key="", model=TRANSLATE_MODEL, prompt=TRANSLATE_PROMPT, pcm_hash=None,
+                                  upload_info=None, deadline_s=JOB_DEADLINE_S):
     """
-    Call SarvamAI flow with given wav file path.
+    Call SarvamAI flow with given wav (or flac) file path.
+    Identical audio (by PCM hash, computed from the file unless given) with the same
+    model and prompt is answered from translation_cache without creating a job, and
+    concurrent identical requests share a single job.
+    If a job uploads the file, `upload_info` (a dict) receives its bytes and seconds.
+    A batch job not finished `deadline_s` seconds after this call fails the request.
     Returns (success: bool, message: str)
     """
+    deadline = time.monotonic() + deadline_s
+    cache_key = None
+    try:
+        cache_key = TranslationCache.key(pcm_hash or pcm_digest(wav_path), model, prompt)
+    except (OSError, EOFError, wave.Error):
+        pass
+    if cache_key is None:
+        return _route_translation(wav_path, api_key, model, prompt, upload_info, deadline)[:2]
+    cached = translation_cache.get(cache_key)
+    if cached is not None:
+        return True, cached
+    # Identical requests already in flight share that job instead of starting their own
+    return translation_flights.do(cache_key, _translate_and_cache, cache_key, wav_path, api_key, model, prompt,
+                                  upload_info, deadline)
+
+
+def _translate_and_cache(cache_key, wav_path, api_key, model, prompt, upload_info=None, deadline=None):
+    success, message, cacheable = _route_translation(wav_path, api_key, model, prompt, upload_info, deadline)
+    if success and cacheable:
+        translation_cache.put(cache_key, message)
+    return success, message
+
+
+def audio_duration(path):
+    """
+    Duration in seconds of a WAV (or, with soundfile, FLAC) file; None if unreadable.
+    """
+    try:
+        with wave.open(path, 'rb') as wf:
+            return wf.getnframes() / float(wf.getframerate())
+    except (OSError, EOFError, wave.Error):
+        pass
+    if sf is not None:
+        try:
+            return sf.info(path).duration
+        except Exception:
+            pass
+    return None
+
+
+class RouteStats:
+    """
+    Latency per translation route ('sync' or 'batch'), over all calls and the most
+    recent `window` of them.
+    """
+
+    def __init__(self, window=50):
+        self.window = window
+        self._lock = threading.Lock()
+        self._routes = {}  # route -> {'count', 'failures', 'total_s', 'recent'}
+
+    def record(self, route, seconds, success=True):
+        with self._lock:
+            entry = self._routes.setdefault(route, {'count': 0, 'failures': 0, 'total_s': 0.0,
+                                                    'recent': collections.deque(maxlen=self.window)})
+            entry['count'] += 1
+            entry['total_s'] += seconds
+            entry['recent'].append(seconds)
+            if not success:
+                entry['failures'] += 1
+
+    def stats(self):
+        with self._lock:
+            out = {}
+            for route, entry in self._routes.items():
+                recent = sorted(entry['recent'])
+                out[route] = {
+                    'count': entry['count'],
+                    'failures': entry['failures'],
+                    'mean_ms': entry['total_s'] * 1000.0 / entry['count'],
+                    'p50_ms': recent[len(recent) // 2] * 1000.0,
+                    'max_ms': recent[-1] * 1000.0,
+                }
+            return out
+
+
+translation_routes = RouteStats()
+
+
+def _route_translation(wav_path, api_key, model, prompt, upload_info=None, deadline=None):
+    """
+    Send short clips to the synchronous endpoint and everything else (or a failed sync
+    call) through a batch job. Returns (success, message, cacheable); when `upload_info`
+    is given, its 'route' records which path answered and 'sync_error' why a sync call
+    fell back. `deadline` (time.monotonic()) bounds the wait for a batch job.
+    """
+    duration = audio_duration(wav_path) if SYNC_MAX_S > 0 else None
+    if duration is not None and duration <= SYNC_MAX_S:
+        t0 = time.perf_counter()
+        result, error = _run_sync_translation(wav_path, api_key, model, prompt)
+        # The request time includes inference, so it only feeds the route stats; the
+        # upload planner learns bandwidth from job.upload_files timings alone
+        translation_routes.record('sync', time.perf_counter() - t0, result is not None and result[0])
+        if result is not None:
+            if upload_info is not None:
+                upload_info['route'] = 'sync'
+            return result
+        if upload_info is not None:
+            upload_info['sync_error'] = error
+    t0 = time.perf_counter()
+    if BATCH_MAX_FILES > 1:
+        result = translation_batcher.submit(wav_path, api_key, model, prompt, upload_info, deadline).result()
+    else:
+        result = _run_translation_job(wav_path, api_key, model, prompt, upload_info, deadline)
+    translation_routes.record('batch', time.perf_counter() - t0, result[0])
+    if upload_info is not None:
+        upload_info['route'] = 'batch'
+    return result
+
+
+def _run_sync_translation(wav_path, api_key, model, prompt):
+    """
+    One synchronous speech-translate request for `wav_path`. Returns (result, error):
+    result is (success, message, cacheable), or None when the request hit a transport or
+    server (5xx) error and the batch flow should take over; error is the exception text.
+    Client errors (auth, 4xx) fail the request instead of being retried as a job.
+    """
+    try:
+        client = sarvam_clients.get(api_key)
+        with open(wav_path, 'rb') as f:
+            response = client.speech_to_text.translate(file=f, model=model, prompt=prompt)
+    except Exception as e:
+        status = getattr(e, 'status_code', None)
+        if isinstance(status, int) and 400 <= status < 500:
+            return (False, f"Sync translation error: {e!r}", False), repr(e)
+        return None, repr(e)
+    transcript = (getattr(response, 'transcript', None) or '').strip()
+    if not transcript:
+        return (True, "Sync request finished (no translation text returned).", False), None
+    return (True, transcript, True), None
+
+
+class JobDeadlineExceeded(TimeoutError):
+    """
+    A batch job was still running when its request deadline passed.
+    """
+
+
+class JobStatusPoller:
+    """
+    Status polling schedule for batch jobs. Intervals start at `min_interval` and back off
+    to `max_interval`; once a job nears the duration that past jobs of the same clip-length
+    bucket took (EWMA), polling tightens again so typical jobs are seen as soon as they
+    finish. A status call that raises is treated as transient until `max_errors` fail in
+    a row.
+    """
+
+    TERMINAL_STATES = ('completed', 'failed')
+
+    def __init__(self, min_interval=POLL_MIN_MS / 1000.0, max_interval=POLL_MAX_S, backoff=1.6, alpha=0.3,
+                 bucket_s=10.0, max_errors=POLL_MAX_ERRORS):
+        self.min_interval = min_interval
+        self.max_errors = max(1, int(max_errors))
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff = backoff
+        self.alpha = alpha
+        self.bucket_s = bucket_s
+        self._lock = threading.Lock()
+        self._expected = {}  # clip-length bucket -> EWMA job seconds
+
+    def _bucket(self, clip_s):
+        return int((clip_s or 0.0) // self.bucket_s)
+
+    def expected(self, clip_s):
+        with self._lock:
+            return self._expected.get(self._bucket(clip_s))
+
+    def record(self, clip_s, seconds):
+        bucket = self._bucket(clip_s)
+        with self._lock:
+            old = self._expected.get(bucket)
+            self._expected[bucket] = seconds if old is None else old + self.alpha * (seconds - old)
+
+    def next_interval(self, interval, elapsed, expected):
+        """
+        Returns (sleep, next_interval) for a job `elapsed` seconds into an `expected` run.
+        """
+        sleep = interval
+        if expected is not None and elapsed < expected:
+            remaining = expected - elapsed
+            if remaining <= sleep:
+                # Land on the expected finish and poll fast around it
+                return max(remaining, self.min_interval), self.min_interval
+            # Don't back off past the point the job is expected to finish
+            sleep = min(sleep, max(remaining, self.min_interval))
+        return sleep, min(interval * self.backoff, self.max_interval)
+
+    @classmethod
+    def job_state(cls, job):
+        return cls.state_of(job.get_status())
+
+    @staticmethod
+    def state_of(status):
+        state = getattr(status, 'job_state', None)
+        if state is None and isinstance(status, dict):
+            state = status.get('job_state')
+        return str(state or '').lower()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'expected_s': {'{}-{}s'.format(int(b * self.bucket_s), int((b + 1) * self.bucket_s)): round(v, 2)
+                               for b, v in sorted(self._expected.items())},
+            }
+
+
+job_poller = JobStatusPoller()
+
+
+class _TrackedJob:
+    __slots__ = ('job', 'clip_s', 'deadline', 'on_complete', 'future', 'start', 'last_running', 'interval',
+                 'expected', 'polls', 'errors', 'state', 'task', 'timer')
+
+    def __init__(self, job, clip_s, deadline, on_complete, expected, min_interval):
+        self.job = job
+        self.clip_s = clip_s
+        self.deadline = deadline
+        self.on_complete = on_complete
+        self.future = Future()
+        self.start = self.last_running = time.monotonic()
+        self.interval = min_interval
+        self.expected = expected
+        self.polls = 0
+        self.errors = 0  # consecutive failed status calls
+        self.state = None  # last status seen (or the exception of a failed call)
+        self.task = None
+        self.timer = None
+
+
+class JobManager:
+    """
+    Tracks every outstanding batch job from one asyncio event loop running in a single
+    daemon thread, so waiting on a job costs no thread of its own. Each job is watched by
+    its own task on job_poller's schedule, so a slow status call only delays that job;
+    blocking SDK calls run on a fixed pool of `workers` threads (a coroutine get_status()
+    is awaited directly). Deadlines are loop timers and fire even while a call is stuck.
+    A job's Future resolves to its terminal state, or to the result of `on_complete(state)`
+    run on the pool; it fails with JobDeadlineExceeded once `deadline` (time.monotonic())
+    passes.
+    """
+
+    def __init__(self, poller=None, workers=JOB_STATUS_THREADS):
+        self.poller = poller or job_poller
+        self.workers = max(1, int(workers))
+        self._lock = threading.Lock()
+        self._loop = None
+        self._executor = None
+        self.outstanding = 0  # only touched on the loop thread
+        self.tracked = 0
+        self.finished = 0
+        self.deadlines = 0
+        self.polls = 0
+        self.poll_errors = 0
+        self.peak = 0
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='job-status')
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='job-manager', daemon=True).start()
+            return self._loop
+
+    def track(self, job, clip_s=None, deadline=None, on_complete=None):
+        """
+        Start watching a started `job`; returns a concurrent.futures.Future.
+        """
+        entry = _TrackedJob(job, clip_s, deadline, on_complete, self.poller.expected(clip_s),
+                            self.poller.min_interval)
+        self._ensure_loop().call_soon_threadsafe(self._add, entry)
+        return entry.future
+
+    def _add(self, entry):
+        self.tracked += 1
+        self.outstanding += 1
+        self.peak = max(self.peak, self.outstanding)
+        entry.task = self._loop.create_task(self._watch(entry))
+        if entry.deadline is not None:
+            # The loop clock is time.monotonic(), the same clock deadlines are given in
+            entry.timer = self._loop.call_at(entry.deadline, self._expire, entry)
+
+    async def _status(self, job):
+        try:
+            if asyncio.iscoroutinefunction(job.get_status):
+                return self.poller.state_of(await job.get_status())
+            return await self._loop.run_in_executor(self._executor, self.poller.job_state, job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return e
+
+    async def _watch(self, entry):
+        while True:
+            state = await self._status(entry.job)
+            now = time.monotonic()
+            entry.polls += 1
+            self.polls += 1
+            entry.state = state
+            if isinstance(state, Exception):
+                # A dropped connection says nothing about the job, which keeps running server-side
+                entry.errors += 1
+                self.poll_errors += 1
+                if entry.errors >= self.poller.max_errors:
+                    self._finish(entry, error=state)
+                    return
+            else:
+                entry.errors = 0
+                if state in self.poller.TERMINAL_STATES:
+                    break
+                entry.last_running = now
+            sleep, entry.interval = self.poller.next_interval(entry.interval, now - entry.start, entry.expected)
+            await asyncio.sleep(sleep)
+        if state == 'completed':
+            # The job finished somewhere between the last two polls
+            self.poller.record(entry.clip_s, (entry.last_running + now) / 2.0 - entry.start)
+        if entry.timer is not None:
+            entry.timer.cancel()
+        if entry.on_complete is None:
+            self._finish(entry, result=state)
+            return
+        try:
+            result = await self._loop.run_in_executor(self._executor, entry.on_complete, state)
+        except Exception as e:
+            self._finish(entry, error=e)
+        else:
+            self._finish(entry, result=result)
+
+    def _expire(self, entry):
+        if entry.future.done():
+            return
+        entry.task.cancel()
+        self.deadlines += 1
+        state = entry.state
+        status = f"status unknown ({state!r})" if isinstance(state, Exception) else f"still {state or 'pending'}"
+        self._finish(entry, error=JobDeadlineExceeded(
+            f"job {status} after {time.monotonic() - entry.start:.1f} s"))
+
+    def _finish(self, entry, result=None, error=None):
+        if entry.future.done():
+            return
+        self.outstanding -= 1
+        if entry.timer is not None:
+            entry.timer.cancel()
+        with self._lock:
+            self.finished += 1
+        if error is not None:
+            entry.future.set_exception(error)
+        else:
+            entry.future.set_result(result)
+
+    def stats(self):
+        with self._lock:
+            finished = self.finished
+        return {
+            'outstanding': self.tracked - finished,
+            'tracked': self.tracked,
+            'peak': self.peak,
+            'threads': self.workers + (1 if self._loop is not None else 0),
+            'polls_per_job': self.polls / float(finished) if finished else 0.0,
+            'poll_errors': self.poll_errors,
+            'deadlines_exceeded': self.deadlines,
+        }
+
+
+job_manager = JobManager()
+
+
+def _run_translation_job(wav_path, api_key, model, prompt, upload_info=None, deadline=None):
+    """
+    One SarvamAI batch job for `wav_path`. Returns (success, message, cacheable) where
+    cacheable is True only when real translation text came back.
+    """
+    infos = [upload_info] if upload_info is not None else None
+    return _run_batch_job([wav_path], api_key, model, prompt, infos, deadline)[0]
+
+
+def _run_batch_job(paths, api_key, model, prompt, upload_infos=None, deadline=None):
+    """
+    One SarvamAI batch job for all of `paths`. Outputs are mapped back to their input
+    file by name. Returns [(success, message, cacheable)] in the order of `paths`.
+    """
+    return submit_batch_job(paths, api_key, model, prompt, upload_infos, deadline).result()
+
+
+def submit_batch_job(paths, api_key, model, prompt, upload_infos=None, deadline=None):
+    """
+    Create, upload and start one SarvamAI batch job for `paths` in the calling thread,
+    then hand it to job_manager. Returns a Future of [(success, message, cacheable)] in
+    the order of `paths`; the job is abandoned once `deadline` (time.monotonic()) passes.
+    """
+    def all_failed(message):
+        return [(False, message, False)] * len(paths)
+
+    def failed_future(message):
+        future = Future()
+        future.set_result(all_failed(message))
+        return future
+
     try:
         # Local import to avoid failing on devices where sarvamai isn't available
         from sarvamai import SarvamAI
     except Exception as e:
-        return False, f"sarvamai lib not available on runtime: {e}"
+        return failed_future(f"sarvamai lib not available on runtime: {e}")
 
     try:
-        client = SarvamAI(api_subscription_key=api_key)
+        client = sarvam_clients.get(api_key)
 
         job = client.speech_to_text_translate_job.create_job(
             model=model,
@@ -98,54 +1990,332 @@ def translate_audio_with_sarvamai(wav_path, api_key="", model="saaras:v2.5", pro
             prompt=prompt
         )
 
-        job.upload_files(file_paths=[wav_path])
+        sizes = [os.path.getsize(p) for p in paths]
+        t0 = time.perf_counter()
+        job.upload_files(file_paths=list(paths))
+        upload_s = time.perf_counter() - t0
+        upload_planner.record_upload(sum(sizes), upload_s)
+        for info, nbytes in zip(upload_infos or (), sizes):
+            if info is not None:
+                # Each file is charged its share of a multi-file upload
+                info.update(bytes=nbytes, seconds=upload_s * nbytes / float(sum(sizes) or 1))
         job.start()
-        final_status = job.wait_until_complete()
-
-        if job.is_failed():
-            return False, "STT job failed."
-
-        output_dir = os.path.join(os.getcwd(), "sarvamai_output")
-        os.makedirs(output_dir, exist_ok=True)
-        job.download_outputs(output_dir=output_dir)
-
-        # Try to extract text from outputs
-        aggregated = []
-        for root, _, files in os.walk(output_dir):
-            for fname in files:
-                if fname.lower().endswith('.txt'):
-                    with open(os.path.join(root, fname), 'r', encoding='utf-8') as f:
-                        txt = f.read().strip()
-                    if txt:
-                        aggregated.append(f"--- {fname} ---\n{txt}")
-                elif fname.lower().endswith('.json'):
-                    try:
-                        with open(os.path.join(root, fname), 'r', encoding='utf-8') as f:
-                            j = json.load(f)
-                        for k in ('text', 'transcript', 'translation', 'translated_text'):
-                            if k in j and isinstance(j[k], str) and j[k].strip():
-                                aggregated.append(f"--- {fname}:{k} ---\n{j[k].strip()}")
-                    except Exception:
-                        pass
+        if not hasattr(job, 'get_status'):
+            # SDK without status polling: block this thread on its own wait
+            job.wait_until_complete()
+            done = Future()
+            done.set_result(_collect_batch_outputs(client, job, paths, None))
+            return done
+        tracked = job_manager.track(job, sum(audio_duration(p) or 0.0 for p in paths), deadline,
+                                    lambda state: _collect_batch_outputs(client, job, paths, state))
+    except Exception as e:
+        return failed_future(f"Translation error: {repr(e)}")
 
-        if aggregated:
-            return True, "\n\n".join(aggregated)
-        else:
-            return True, f"Output downloaded to: {output_dir} (no text/json translation found)."
+    results = Future()
+
+    def resolve(done):
+        try:
+            results.set_result(done.result())
+        except JobDeadlineExceeded as e:
+            results.set_result(all_failed(f"STT job timed out: {e}."))
+        except Exception as e:
+            results.set_result(all_failed(f"Translation error: {repr(e)}"))
+
+    tracked.add_done_callback(resolve)
+    return results
+
+
+def _collect_batch_outputs(client, job, paths, state):
+    """
+    Fetch and parse a finished job's outputs, mapped back to `paths` by file name.
+    """
+    def all_failed(message):
+        return [(False, message, False)] * len(paths)
+
+    try:
+        if state == 'failed' or job.is_failed():
+            return all_failed("STT job failed.")
+
+        # Parse the outputs straight from memory; no app-storage writes on the result path
+        output_dir = None
+        try:
+            outputs = fetch_job_outputs(client, job)
+        except Exception:
+            outputs = None
+        if outputs is None:
+            # SDK without download links: download into this job's own directory instead
+            output_dir = job_output_dir(job)
+            storage.pin(output_dir)
+            try:
+                job.download_outputs(output_dir=output_dir)
+                outputs = read_output_files(output_dir)
+            finally:
+                storage.touch(output_dir)
+                storage.unpin(output_dir)
+                storage.enforce()
+
+        results = []
+        for path in paths:
+            if len(paths) == 1:
+                mine = outputs
+            else:
+                # Outputs are named after their input (`rec.json` or `rec.wav.json`)
+                stem = os.path.splitext(os.path.basename(path))[0]
+                mine = [(f, t) for f, t in outputs if f == stem or f.startswith(stem + '.')]
+            aggregated = parse_job_outputs(mine)
+            if aggregated:
+                results.append((True, "\n\n".join(aggregated), True))
+            elif output_dir is not None:
+                results.append((True, f"Output downloaded to: {output_dir} (no text/json translation found).", False))
+            else:
+                names = ", ".join(name for name, _ in mine) or "none"
+                results.append((True, f"Job finished (no text/json translation found in outputs: {names}).", False))
+        return results
     except Exception as e:
-        return False, f"Translation error: {repr(e)}"
+        return all_failed(f"Translation error: {repr(e)}")
+
+
+class TranslationBatcher:
+    """
+    Collects clips for up to `window_ms` (or until `max_files` are waiting) and sends them
+    as one multi-file SarvamAI job, so short utterances share the create/start/wait
+    overhead. Clips are grouped by (api_key, model, prompt); each caller gets a Future
+    resolving to its own (success, message, cacheable).
+    """
+
+    def __init__(self, max_files=BATCH_MAX_FILES, window_ms=BATCH_WINDOW_MS):
+        self.max_files = max(1, int(max_files))
+        self.window_s = window_ms / 1000.0
+        self._lock = threading.Lock()
+        self._pending = {}  # group key -> [(path, upload_info, deadline, future)]
+        self.batches = 0
+        self.files = 0
+        self.job_seconds = 0.0
+
+    def submit(self, path, api_key, model, prompt, upload_info=None, deadline=None):
+        key = (api_key, model, prompt)
+        future = Future()
+        flush = None
+        with self._lock:
+            group = self._pending.setdefault(key, [])
+            group.append((path, upload_info, deadline, future))
+            if len(group) >= self.max_files:
+                flush = self._pending.pop(key)
+            elif len(group) == 1:
+                timer = threading.Timer(self.window_s, self._flush_expired, args=(key, group))
+                timer.daemon = True
+                timer.start()
+        if flush is not None:
+            threading.Thread(target=self._run, args=(key, flush), name='translate-batch', daemon=True).start()
+        return future
+
+    def _flush_expired(self, key, group):
+        with self._lock:
+            # The group may already have been sent because it filled up
+            if self._pending.get(key) is not group:
+                return
+            del self._pending[key]
+        self._run(key, group)
+
+    def _run(self, key, items):
+        api_key, model, prompt = key
+        t0 = time.perf_counter()
+        try:
+            # The job is shared, so it waits only as long as its most urgent clip allows
+            deadlines = [d for _, _, d, _ in items if d is not None]
+            batch = submit_batch_job([p for p, _, _, _ in items], api_key, model, prompt,
+                                     [i for _, i, _, _ in items], min(deadlines) if deadlines else None)
+        except BaseException as e:
+            for _, _, _, future in items:
+                future.set_exception(e)
+            return
+        batch.add_done_callback(lambda done: self._resolve(items, done.result(), time.perf_counter() - t0))
+
+    def _resolve(self, items, results, elapsed):
+        with self._lock:
+            self.batches += 1
+            self.files += len(items)
+            self.job_seconds += elapsed
+        for (_, _, _, future), result in zip(items, results):
+            future.set_result(result)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'files': self.files,
+                'files_per_batch': self.files / float(self.batches) if self.batches else 0.0,
+                'per_clip_overhead_ms': self.job_seconds * 1000.0 / self.files if self.files else 0.0,
+            }
+
+
+translation_batcher = TranslationBatcher()
+
+
+class TranslationQueueFull(RuntimeError):
+    """
+    Raised through a TranslationPool future when its job was rejected or dropped.
+    """
+
+
+class TranslationPool:
+    """
+    Fixed set of worker threads running translation jobs from a bounded FIFO queue.
+    submit() returns a concurrent.futures.Future; what happens when the queue is full is
+    decided by `overflow` ('reject', 'drop_oldest' or 'coalesce').
+    """
+
+    def __init__(self, workers=TRANSLATE_WORKERS, max_queue=TRANSLATE_QUEUE_MAX, overflow=TRANSLATE_OVERFLOW):
+        if overflow not in ('reject', 'drop_oldest', 'coalesce'):
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        self.workers = max(1, int(workers))
+        self.max_queue = max(1, int(max_queue))
+        self.overflow = overflow
+        self._cond = threading.Condition()
+        self._queue = collections.deque()  # [key, future, fn, args, enqueued_at]
+        self._threads = []
+        self._active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.last_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self._total_wait_ms = 0.0
+
+    def submit(self, fn, *args, key=None):
+        """
+        Queue fn(*args). With the 'coalesce' policy, a request whose `key` matches a job
+        that is still waiting gets that job's future instead of a new job.
+        """
+        with self._cond:
+            self.submitted += 1
+            if self.overflow == 'coalesce' and key is not None:
+                for item in self._queue:
+                    if item[0] == key:
+                        self.coalesced += 1
+                        return item[1]
+            future = Future()
+            if len(self._queue) >= self.max_queue:
+                if self.overflow == 'drop_oldest':
+                    oldest = self._queue.popleft()
+                    self.dropped += 1
+                    oldest[1].set_exception(TranslationQueueFull("dropped: translation queue full"))
+                else:
+                    self.rejected += 1
+                    future.set_exception(TranslationQueueFull(
+                        f"translation queue full ({len(self._queue)} waiting)"))
+                    return future
+            self._queue.append([key, future, fn, args, time.perf_counter()])
+            self.max_depth = max(self.max_depth, len(self._queue))
+            if len(self._threads) < self.workers and self._active + len(self._queue) > len(self._threads):
+                t = threading.Thread(target=self._worker, name=f"translate-{len(self._threads) + 1}", daemon=True)
+                self._threads.append(t)
+                t.start()
+            self._cond.notify()
+        return future
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                key, future, fn, args, enqueued_at = self._queue.popleft()
+                wait_ms = (time.perf_counter() - enqueued_at) * 1000.0
+                self.last_wait_ms = wait_ms
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+                self._total_wait_ms += wait_ms
+                self._active += 1
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+            with self._cond:
+                self._active -= 1
+                self.completed += 1
+
+    def stats(self):
+        with self._cond:
+            started = self.completed + self._active
+            return {
+                'workers': self.workers,
+                'active': self._active,
+                'depth': len(self._queue),
+                'max_depth': self.max_depth,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'dropped': self.dropped,
+                'coalesced': self.coalesced,
+                'last_wait_ms': self.last_wait_ms,
+                'max_wait_ms': self.max_wait_ms,
+                'avg_wait_ms': self._total_wait_ms / started if started else 0.0,
+            }
+
+
+class RecordingSession:
+    """
+    One press-and-hold recording and its translation. Owns the WAV path, capture thread,
+    stop/finished signals, timings and result, so a new press never disturbs a clip
+    that is still being recorded or translated.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self):
+        self.id = next(RecordingSession._ids)
+        self.wav_path = None
+        self.api_key = ""
+        self.thread = None
+        self.stop_event = threading.Event()  # set on release
+        self.recorded = Future()  # resolved with the WAV path (None on failure) once closed
+        self.capture = None  # (engine, [consumers]) while audio is flowing from the mic
+        self.capture_stats = {}  # overrun / high-water / latency counters
+        self.pcm_hash = None  # sha256 of the captured PCM, computed while writing
+        self.trim_stats = {}  # silence trimmed before upload
+        self.level_stats = {}  # duration / RMS / peak / clipping measured during capture
+        self.encode_stats = {}  # upload payload format, compression ratio and encode time
+        self.timings = {'pressed': time.perf_counter()}
+        self.result = None  # (success, message) from translation
+        # Streaming mode: per-segment results, shown strictly in capture order
+        self.streamed = False
+        self.segment_lock = threading.Lock()
+        self.segment_results = {}  # index -> (success, message), or None when not sent
+        self.segment_count = None  # known once capture has ended
+        self.next_segment = 0  # next index to display
+
+    def mark(self, name):
+        self.timings[name] = time.perf_counter()
+
+    def elapsed_ms(self, start, end):
+        if start not in self.timings or end not in self.timings:
+            return None
+        return (self.timings[end] - self.timings[start]) * 1000.0
+
+    def stop(self):
+        self.mark('released')
+        self.stop_event.set()
+        capture = self.capture
+        if capture is not None:
+            engine, consumers = capture
+            for consumer in consumers:
+                engine.end_consumer(consumer)
 
 
 class RootWidget(BoxLayout):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.audio_thread = None
-        self.recording = False
-        self.wav_path = None
-
-        # Android-specific audio objects
-        self._ar = None  # AudioRecord instance (pyjnius) on Android
-        self._buffer_size = 0
+        self.session = None  # RecordingSession currently being recorded
+        self._record_touch = None  # touch holding the record button for self.session
+        self._warm_source = None  # always-open mic source in warm-capture mode
+        self.translation_pool = TranslationPool()
+        # Parts of long recordings run here, not on translation_pool, so a pool worker
+        # waiting for its parts can never be starved by them
+        self.segment_executor = ThreadPoolExecutor(max_workers=LONG_PARALLEL_JOBS,
+                                                   thread_name_prefix='long-part')
 
     def append_output(self, txt):
         # Must run on UI thread
@@ -154,155 +2324,438 @@ class RootWidget(BoxLayout):
             self.ids.output_box.text += str(txt) + "\n"
         _do()
 
+    def start_warm_capture(self):
+        """
+        Open the mic and keep filling the pre-roll ring until stop_warm_capture().
+        """
+        if self._warm_source is not None or (not ANDROID and not HAVE_DESKTOP_AUDIO):
+            return
+        source = open_mic_source(extra_seconds=PREROLL_MS / 1000.0)
+        try:
+            source.start()
+        except Exception as e:
+            self.append_output("Warm capture unavailable: " + str(e))
+            return
+        self._warm_source = source
+
+    def stop_warm_capture(self):
+        source, self._warm_source = self._warm_source, None
+        if source is not None:
+            source.stop()
+
     def on_record_press(self, touch):
         # ensure it's a press on button
-        if not self.ids.record_btn.collide_point(*touch.pos):
+        btn = self.ids.record_btn
+        if not btn.collide_point(*touch.pos):
             return
-        self.ids.record_btn.text = "Recording..."
+        # A second press while one session is live (multi-touch, or a missed release)
+        # must not orphan the first recording
+        self._finish_recording()
+        # Grab the touch so its release reaches the button even if it lands elsewhere
+        touch.grab(btn)
+        self._record_touch = touch
+        session = RecordingSession()
+        session.api_key = self.ids.api_key.text.strip()  # streamed segments upload while held
+        btn.text = "Recording..."
         self.ids.output_box.text = self.ids.output_box.text  # ensure widget exists
-        # Start recording thread
-        self.audio_thread = threading.Thread(target=self._record_worker, daemon=True)
-        self.recording = True
-        self.audio_thread.start()
+        # Start recording thread; earlier sessions may still be translating
+        self.session = session
+        session.thread = threading.Thread(target=self._record_worker, args=(session,), daemon=True)
+        session.thread.start()
 
     def on_record_release(self, touch):
-        if not self.ids.record_btn.collide_point(*touch.pos):
+        # Only the release of the touch that started recording stops it, wherever it lands
+        btn = self.ids.record_btn
+        if touch.grab_current is not btn:
             return
-        self.recording = False
+        touch.ungrab(btn)
+        if touch is self._record_touch:
+            self._finish_recording()
+
+    def _finish_recording(self):
+        self._record_touch = None
+        session, self.session = self.session, None
+        if session is None:
+            return
+        session.stop()
+        session.api_key = self.ids.api_key.text.strip()
         self.ids.record_btn.text = "⏺ Hold to Record"
-        # Upload and translate in separate thread so UI remains responsive
-        t = threading.Thread(target=self._post_process_and_translate, daemon=True)
-        t.start()
+        # Queue the translation as soon as the recorder has closed this session's WAV file
+        session.recorded.add_done_callback(lambda _: self._queue_translation(session))
 
-    def _record_worker(self):
-        # Create temp wav path
-        fd, path = tempfile.mkstemp(prefix="rec_", suffix=".wav")
-        os.close(fd)
-        self.wav_path = path
+    def _queue_translation(self, session):
+        path = session.recorded.result()
+        if not path or not os.path.exists(path):
+            self.append_output(f"[#{session.id}] No recorded file found.")
+            if path:
+                storage.unpin(path)
+            return
+        if session.streamed:
+            # Segments were already translated while the button was held
+            storage.unpin(path)
+            return
+        reason = clip_gate.check(session.level_stats) if session.level_stats else None
+        if reason is not None:
+            storage.unpin(path)
+            self.append_output("[#{}] Not sent: {} ({} jobs saved so far)".format(
+                session.id, reason, clip_gate.stats()['jobs_saved']))
+            return
+        session.mark('queued')
+        future = self.translation_pool.submit(self._post_process_and_translate, session,
+                                              key=session.pcm_hash or path)
 
-        sample_rate = 16000
-        channels = 1
-        sampwidth = 2  # bytes per sample (16-bit)
+        def _done(f):
+            storage.unpin(path)
+            storage.enforce()
+            exc = f.exception()
+            if isinstance(exc, TranslationQueueFull):
+                self.append_output(f"[#{session.id}] Translation skipped: {exc}")
+            elif exc is not None:
+                self.append_output(f"[#{session.id}] Translation failed: {exc!r}")
+            elif f.result() is not session:
+                # Coalesced into an identical queued clip; report that clip's result here too
+                leader = f.result()
+                session.result = leader.result
+                success, message = leader.result
+                self.append_output("[#{}] Merged with #{}; translation {}:".format(
+                    session.id, leader.id, "result" if success else "failed"))
+                self.append_output(message)
+        future.add_done_callback(_done)
 
-        if ANDROID:
-            try:
-                self.append_output("Starting Android AudioRecord capture (16kHz, mono, 16-bit).")
-                self._record_android_pcm(path, sample_rate, channels)
-            except Exception as e:
-                self.append_output("Android record error: " + str(e))
-        else:
-            # Desktop fallback using sounddevice
-            if not HAVE_DESKTOP_AUDIO:
+    def _record_worker(self, session):
+        # Resolves session.recorded with the finished WAV path (None on failure) once closed
+        path = None
+        try:
+            if not ANDROID and not HAVE_DESKTOP_AUDIO:
                 self.append_output("Desktop audio libs not available (sounddevice/soundfile). Cannot record.")
                 return
+            # Pinned in the managed recordings area until its translation is finished
+            path = storage.new_recording_path()
+            session.wav_path = path
             try:
-                self.append_output("Starting desktop capture (sounddevice). Speak now...")
-                duration = 600  # max seconds guard; we'll stop earlier when user releases
-                frames = []
-                def callback(indata, frames_count, time_info, status):
-                    if not self.recording:
-                        raise sd.CallbackStop()
-                    frames.append(indata.copy())
-                with sd.InputStream(samplerate=sample_rate, channels=channels, dtype='int16', callback=callback):
-                    while self.recording:
-                        time.sleep(0.05)
-                data = b''.join([f.tobytes() for f in frames])
-                # write wav
-                with wave.open(path, 'wb') as wf:
-                    wf.setnchannels(channels)
-                    wf.setsampwidth(sampwidth)
-                    wf.setframerate(sample_rate)
-                    wf.writeframes(data)
-                self.append_output(f"Saved WAV to: {path}")
+                self._record_to_wav(session)
             except Exception as e:
-                self.append_output("Desktop record error: " + str(e))
-                return
+                label = "Android" if ANDROID else "Desktop"
+                self.append_output(f"[#{session.id}] {label} record error: " + str(e))
+        finally:
+            if path:
+                storage.touch(path)
+            session.mark('recorded')
+            session.recorded.set_result(path)
 
-    def _record_android_pcm(self, out_wav_path, sample_rate=16000, channels=1):
+    def _record_to_wav(self, session):
         """
-        Use Android AudioRecord via pyjnius to capture raw PCM 16-bit and write WAV.
+        Stream mic audio into the session's 16 kHz mono PCM_16 WAV until release.
+        Uses the warm source (with pre-roll) when one is running, else opens the mic.
         """
-        # pyjnius classes
-        AudioRecord = autoclass('android.media.AudioRecord')
-        AudioFormat = autoclass('android.media.AudioFormat')
-        AudioManager = autoclass('android.media.AudioManager')
-        AudioTrack = autoclass('android.media.AudioTrack')
-        MediaRecorder = autoclass('android.media.MediaRecorder')
-        PythonActivity = autoclass('org.kivy.android.PythonActivity')
-        activity = PythonActivity.mActivity
+        duration = 600  # max seconds guard; we'll stop earlier when user releases
+        max_bytes = duration * SAMPLE_RATE * CHANNELS * SAMPWIDTH
 
-        # constants
-        AUDIO_SOURCE_MIC = MediaRecorder.AudioSource.MIC
-        CHANNEL_IN_MONO = AudioFormat.CHANNEL_IN_MONO
-        ENCODING_PCM_16BIT = AudioFormat.ENCODING_PCM_16BIT
+        source = self._warm_source
+        if source is not None and source.engine.closed:
+            # Warm mic died (device error); fall back to opening it for this recording
+            self._warm_source = None
+            source = None
+        cold = source is None
+        if cold:
+            if ANDROID:
+                self.append_output("Starting Android AudioRecord capture (16kHz, mono, 16-bit).")
+            else:
+                self.append_output("Starting desktop capture (sounddevice). Speak now...")
+            source = open_mic_source()
+        engine = source.engine
+        overruns_before = engine.overruns
 
-        # Determine min buffer size
-        min_buf = AudioRecord.getMinBufferSize(sample_rate, CHANNEL_IN_MONO, ENCODING_PCM_16BIT)
-        # We read in chunks of min_buf/2 typically
-        if min_buf <= 0:
-            min_buf = sample_rate * 2  # fallback
-        self._buffer_size = int(min_buf)
+        consumer = f"wav-{session.id}"
+        preroll = 0 if cold else PREROLL_MS * SAMPLE_RATE * CHANNELS * SAMPWIDTH // 1000
+        engine.add_consumer(consumer, backlog_bytes=preroll)
+        consumers = [consumer]
+        segment_thread = None
+        if STREAM_SEGMENTS:
+            # Second reader of the same ring cuts segments at pauses while the WAV is written
+            session.streamed = True
+            seg_consumer = f"seg-{session.id}"
+            engine.add_consumer(seg_consumer, backlog_bytes=preroll)
+            consumers.append(seg_consumer)
+            segment_thread = threading.Thread(target=self._segment_worker, args=(session, engine, seg_consumer),
+                                              name=f"segmenter-{session.id}", daemon=True)
+            segment_thread.start()
+        session.capture = (engine, consumers)
+        if session.stop_event.is_set():
+            # Released before capture was wired up
+            for name in consumers:
+                engine.end_consumer(name)
 
-        # Create AudioRecord instance
-        ar = AudioRecord(AUDIO_SOURCE_MIC, sample_rate, CHANNEL_IN_MONO, ENCODING_PCM_16BIT, self._buffer_size)
-        if ar.getState() != AudioRecord.STATE_INITIALIZED:
-            raise RuntimeError("AudioRecord initialization failed (state != INITIALIZED)")
+        written = 0
+        hasher = new_pcm_hasher()
+        analyzer = ClipAnalyzer()
+        try:
+            with wave.open(session.wav_path, 'wb') as wf:
+                wf.setnchannels(CHANNELS)
+                wf.setsampwidth(SAMPWIDTH)
+                wf.setframerate(SAMPLE_RATE)
+                if cold:
+                    source.start()
+                    if ANDROID:
+                        self.append_output(f"Recording (Android, {source.reader.mode} reads) ... speak now")
+                for chunk in engine.consume(consumer):
+                    if written == 0:
+                        session.mark('first_sample')
+                    wf.writeframes(chunk)
+                    hasher.update(chunk)
+                    analyzer.update(chunk)
+                    written += len(chunk)
+                    if written >= max_bytes:
+                        break
+        finally:
+            session.capture = None
+            engine.remove_consumer(consumer)
+            if segment_thread is not None:
+                engine.end_consumer(consumers[1])
+                segment_thread.join()
+                engine.remove_consumer(consumers[1])
+            if cold:
+                source.stop()
 
-        # Prepare WAV file for writing
-        wf = wave.open(out_wav_path, 'wb')
-        wf.setnchannels(channels)
-        wf.setsampwidth(2)  # 16-bit
-        wf.setframerate(sample_rate)
+        session.pcm_hash = hasher.hexdigest()
+        session.level_stats = analyzer.stats()
+        first_sample_ms = session.elapsed_ms('pressed', 'first_sample')
+        session.capture_stats = dict(engine.stats(), overruns=engine.overruns - overruns_before,
+                                     first_sample_ms=first_sample_ms, preroll_bytes=preroll)
+        if source.error is not None:
+            session.capture_stats['error'] = repr(source.error)
+            self.append_output(f"[#{session.id}] Capture stopped early, mic reader failed: {source.error!r}")
+        self.append_output(f"[#{session.id}] Saved WAV to: {session.wav_path}")
+        if first_sample_ms is not None:
+            self.append_output(f"[#{session.id}] Press-to-first-sample: {first_sample_ms:.0f} ms"
+                               + (f" (+{PREROLL_MS} ms pre-roll)" if preroll else ""))
+        if session.capture_stats['overruns']:
+            self.append_output("[#{id}] Capture overruns: {overruns} chunks dropped (ring high-water "
+                               "{high_water}/{capacity} bytes)".format(id=session.id, **session.capture_stats))
 
-        # Create Java short[] buffer
-        # jnius.jarray('h', size) is used to create Java short array
-        chunk_size = int(self._buffer_size // 2)  # buffer_size is in bytes; shorts are 2 bytes
-        java_buffer = jarray('h', chunk_size)
+    def _post_process_and_translate(self, session):
+        # Runs on a translation pool worker
+        cached = None
+        if session.pcm_hash:
+            cached = translation_cache.get(TranslationCache.key(session.pcm_hash, TRANSLATE_MODEL, TRANSLATE_PROMPT),
+                                           count_miss=False)
+        if cached is not None:
+            # Repeat of a translated clip: no trim, encode or upload needed
+            session.mark('translated')
+            session.result = (True, cached)
+            self.append_output(f"[#{session.id}] Translation result (cached):")
+            self.append_output(cached)
+            self.append_output("[#{}] Release-to-text: {:.0f} ms".format(
+                session.id, session.elapsed_ms('released', 'translated')))
+            return session
+        if TRIM_SILENCE:
+            self._trim_silence(session)
+        session.mark('translate_start')
+        stats = self.translation_pool.stats()
+        self.append_output("[#{}] Starting translation upload (waited {:.0f} ms, {} queued)...".format(
+            session.id, session.elapsed_ms('queued', 'translate_start'), stats['depth']))
+        duration = session.trim_stats.get('duration', 0.0) - session.trim_stats.get('seconds_saved', 0.0)
+        if not duration and session.level_stats:
+            duration = session.level_stats['duration']
+        if duration > LONG_CLIP_S:
+            success, message = self._translate_long(session)
+        else:
+            success, message, session.encode_stats = self._upload_and_translate(
+                f"#{session.id}", session.wav_path, session.api_key, session.pcm_hash)
+        session.mark('translated')
+        session.result = (success, message)
+        if success:
+            self.append_output(f"[#{session.id}] Translation result:")
+            self.append_output(message)
+        else:
+            self.append_output(f"[#{session.id}] Translation failed: " + message)
+        self.append_output("[#{}] Release-to-text: {:.0f} ms".format(
+            session.id, session.elapsed_ms('released', 'translated')))
+        return session
 
-        ar.startRecording()
-        self.append_output("Recording (Android) ... speak now")
+    def _upload_and_translate(self, tag, path, api_key, pcm_hash):
+        """
+        Encode `path` for upload (format per UPLOAD_FORMAT) and translate it.
+        Returns (success, message, encode_stats); logs the format decision and timing.
+        """
+        upload_path, encode_stats = encode_for_upload(path)
+        if encode_stats['format'] != 'wav':
+            self.append_output("[{}] Encoded {format}: {bytes_in} -> {bytes_out} bytes "
+                               "({ratio:.2f}x, {encode_ms:.0f} ms)".format(tag, **encode_stats))
+        elif 'error' in encode_stats:
+            self.append_output(f"[{tag}] {UPLOAD_FORMAT} encoding failed, uploading WAV: " + encode_stats['error'])
+        if 'predicted_s' in encode_stats:
+            predicted = encode_stats['predicted_s']
+            self.append_output("[{}] Upload format {} (predicted wav {:.0f} ms, flac {:.0f} ms incl. encode)".format(
+                tag, encode_stats['format'], predicted['wav'] * 1000, predicted['flac'] * 1000))
+        upload_info = {}
+        try:
+            success, message = translate_audio_with_sarvamai(upload_path, api_key=api_key, model=TRANSLATE_MODEL,
+                                                             prompt=TRANSLATE_PROMPT, pcm_hash=pcm_hash,
+                                                             upload_info=upload_info)
+            if 'sync_error' in upload_info:
+                self.append_output(f"[{tag}] Sync request failed, sent as a batch job: " + upload_info['sync_error'])
+            if 'route' in upload_info:
+                routes = translation_routes.stats()
+                self.append_output("[{}] Route {}: {}".format(tag, upload_info['route'], ", ".join(
+                    "{} avg {:.0f} ms over {}".format(name, r['mean_ms'], r['count'])
+                    for name, r in sorted(routes.items()))))
+            if 'seconds' in upload_info and 'predicted_s' in encode_stats:
+                fmt = encode_stats['format']
+                predicted_ms = encode_stats['predicted_s'][fmt] * 1000
+                actual_ms = upload_info['seconds'] * 1000 + encode_stats['encode_ms']
+                self.append_output("[{}] {} upload: predicted {:.0f} ms, actual {:.0f} ms ({:.0f} kbit/s)".format(
+                    tag, fmt, predicted_ms, actual_ms,
+                    upload_info['bytes'] * 8 / 1000.0 / max(upload_info['seconds'], 1e-6)))
+        finally:
+            if upload_path != path:
+                # The encoded copy is only an upload artifact; the WAV stays in storage
+                try:
+                    os.remove(upload_path)
+                except OSError:
+                    pass
+        return success, message, encode_stats
 
+    def _translate_long(self, session):
+        """
+        Split a long recording at quiet points and translate the parts as parallel jobs;
+        the transcripts are stitched back in order with overlapping words removed.
+        """
         try:
-            while self.recording:
-                read = ar.read(java_buffer, 0, chunk_size)
-                if read > 0:
-                    # convert Java short[] to Python bytes little-endian
-                    # java_buffer is iterable; iterate first `read` elements
-                    b = bytearray()
-                    for i in range(read):
-                        # short value may be Python int already
-                        sval = int(java_buffer[i])
-                        # pack as little-endian signed short
-                        b.extend(struct.pack('<h', sval))
-                    wf.writeframes(b)
-                else:
-                    time.sleep(0.01)
+            plan = plan_wav_segments(session.wav_path)
+        except (OSError, EOFError, wave.Error) as e:
+            self.append_output(f"[#{session.id}] Could not split long clip ({e}); sending whole")
+            return self._upload_and_translate(f"#{session.id}", session.wav_path, session.api_key,
+                                              session.pcm_hash)[:2]
+        self.append_output(f"[#{session.id}] Long clip: {len(plan)} parts, up to {LONG_PARALLEL_JOBS} in parallel")
+        parts = []
+        hashes = []
+        try:
+            for i, (start, end) in enumerate(plan):
+                path = storage.new_recording_path()
+                copy_wav_range(session.wav_path, path, start, end)
+                storage.touch(path)
+                parts.append(path)
+                # Hash the WAV part now; an encoded FLAC upload can't be hashed later
+                hashes.append(pcm_digest(path))
+            futures = [self.segment_executor.submit(self._upload_and_translate, f"#{session.id}/{i + 1}",
+                                                    path, session.api_key, part_hash)
+                       for i, (path, part_hash) in enumerate(zip(parts, hashes))]
+            results = [f.result()[:2] for f in futures]
         finally:
-            try:
-                ar.stop()
-                ar.release()
-            except Exception:
-                pass
-            wf.close()
-            self.append_output(f"Saved WAV to: {out_wav_path}")
+            for path in parts:
+                storage.unpin(path)
+        failed = [i + 1 for i, (ok, _) in enumerate(results) if not ok]
+        if failed:
+            return False, "parts {} failed: {}".format(
+                ", ".join(map(str, failed)), results[failed[0] - 1][1])
+        message = stitch_transcripts([strip_output_labels(msg) for _, msg in results])
+        # Cache the whole clip only if every part came back with real text (and so was cached)
+        if session.pcm_hash and all(
+                translation_cache.contains(TranslationCache.key(h, TRANSLATE_MODEL, TRANSLATE_PROMPT)) for h in hashes):
+            translation_cache.put(TranslationCache.key(session.pcm_hash, TRANSLATE_MODEL, TRANSLATE_PROMPT), message)
+        return True, message
 
-    def _post_process_and_translate(self):
-        # Small pause to ensure file closed
-        time.sleep(0.2)
-        path = self.wav_path
-        if not path or not os.path.exists(path):
-            self.append_output("No recorded file found.")
+    def _segment_worker(self, session, engine, consumer):
+        # Streaming mode: runs alongside the WAV writer until the button is released
+        index = itertools.count()
+
+        def on_segment(pcm):
+            self._queue_segment(session, next(index), pcm)
+
+        segmenter = PauseSegmenter(on_segment)
+        try:
+            for chunk in engine.consume(consumer):
+                segmenter.feed(chunk)
+            segmenter.flush()
+        finally:
+            self._finish_segments(session, segmenter.segments)
+
+    def _queue_segment(self, session, index, pcm):
+        tag = f"#{session.id}.{index + 1}"
+        analyzer = ClipAnalyzer()
+        analyzer.update(pcm)
+        reason = clip_gate.check(analyzer.stats())
+        if reason is not None:
+            self._deliver_segment(session, index, None)
             return
+        hasher = new_pcm_hasher()
+        hasher.update(pcm)
+        pcm_hash = hasher.hexdigest()
+        path = storage.new_recording_path()
+        with wave.open(path, 'wb') as wf:
+            wf.setnchannels(CHANNELS)
+            wf.setsampwidth(SAMPWIDTH)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(pcm)
+        storage.touch(path)
+        future = self.translation_pool.submit(self._upload_and_translate, tag, path, session.api_key, pcm_hash,
+                                              key=pcm_hash)
+
+        def _done(f):
+            storage.unpin(path)
+            storage.enforce()
+            try:
+                success, message, _ = f.result()
+            except Exception as e:
+                success, message = False, str(e) if isinstance(e, TranslationQueueFull) else repr(e)
+            self._deliver_segment(session, index, (success, message))
+        future.add_done_callback(_done)
 
-        self.append_output("Starting translation upload...")
-        api_key = self.ids.api_key.text.strip()
+    def _deliver_segment(self, session, index, result):
+        # Show finished segments strictly in order; a later one waits for earlier ones
+        ready = []
+        with session.segment_lock:
+            session.segment_results[index] = result
+            while session.next_segment in session.segment_results:
+                ready.append((session.next_segment, session.segment_results[session.next_segment]))
+                session.next_segment += 1
+            if ready and ready[-1][1] is not None and 'first_text' not in session.timings:
+                session.mark('first_text')
+                ttft = session.elapsed_ms('pressed', 'first_text')
+            else:
+                ttft = None
+            complete = session.segment_count is not None and session.next_segment >= session.segment_count
+        for i, res in ready:
+            if res is None:
+                continue
+            success, message = res
+            if success:
+                self.append_output(f"[#{session.id}.{i + 1}] {message}")
+            else:
+                self.append_output(f"[#{session.id}.{i + 1}] Translation failed: {message}")
+        if ttft is not None:
+            self.append_output(f"[#{session.id}] Time to first text: {ttft:.0f} ms after press")
+        if ready and complete:
+            self._segments_complete(session)
 
-        success, message = translate_audio_with_sarvamai(path, api_key=api_key, model="saaras:v2.5")
-        if success:
-            self.append_output("Translation result:")
-            self.append_output(message)
-        else:
-            self.append_output("Translation failed: " + message)
+    def _finish_segments(self, session, count):
+        with session.segment_lock:
+            session.segment_count = count
+            complete = session.next_segment >= count
+        if complete:
+            self._segments_complete(session)
+
+    def _segments_complete(self, session):
+        session.mark('translated')
+        if not session.segment_count:
+            self.append_output(f"[#{session.id}] Not sent: no speech detected")
+            return
+        released = session.elapsed_ms('released', 'translated')
+        self.append_output("[#{}] All {} segment(s) done; release-to-last-text: {:.0f} ms".format(
+            session.id, session.segment_count, max(0.0, released or 0.0)))
+
+    def _trim_silence(self, session):
+        # Leading/trailing silence is cut before upload; the cache key stays the raw capture hash
+        try:
+            session.trim_stats = trim_wav_silence(session.wav_path)
+        except (OSError, EOFError, wave.Error) as e:
+            self.append_output(f"[#{session.id}] Silence trim skipped: {e}")
+            return
+        storage.touch(session.wav_path)
+        if session.trim_stats['bytes_saved']:
+            self.append_output("[#{}] Trimmed {:.2f} s of silence ({:.0f} KB less to upload)".format(
+                session.id, session.trim_stats['seconds_saved'], session.trim_stats['bytes_saved'] / 1024.0))
 
 
 class SpeechTranslatorApp(App):
@@ -310,6 +2763,37 @@ class SpeechTranslatorApp(App):
         Builder.load_string(KV)
         return RootWidget()
 
+    def on_start(self):
+        # Clear out leftovers from earlier runs without holding up the first frame
+        threading.Thread(target=self._sweep_storage, daemon=True).start()
+        if WARM_CAPTURE:
+            self.root.start_warm_capture()
+
+    def _sweep_storage(self):
+        try:
+            freed = storage.sweep()
+        except OSError as e:
+            self.root.append_output("Storage sweep failed: " + str(e))
+            return
+        stats = storage.stats()
+        if freed or stats['orphans_removed']:
+            self.root.append_output("Storage: reclaimed {:.1f} MB ({} orphans, {} evicted); {} items, {:.1f} MB in use".format(
+                stats['bytes_reclaimed'] / 1e6, stats['orphans_removed'], stats['items_reclaimed'],
+                stats['items'], stats['bytes'] / 1e6))
+
+    def on_pause(self):
+        # Release the mic while in the background
+        self.root.stop_warm_capture()
+        return True
+
+    def on_resume(self):
+        if WARM_CAPTURE:
+            self.root.start_warm_capture()
+
+    def on_stop(self):
+        self.root.stop_warm_capture()
+        sarvam_clients.clear()
+
 
 if __name__ == '__main__':
     SpeechTranslatorApp().run()